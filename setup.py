@@ -19,6 +19,12 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/decoupca/solarwinds",
     install_requires=INSTALL_REQUIRES,
+    extras_require={
+        "fast": ["orjson"],
+        "http2": ["httpx[http2]"],
+        "stream": ["ijson"],
+        "cache": ["diskcache"],
+    },
     dependency_links=[],
     classifiers=[
         "Operating System :: POSIX :: Linux",
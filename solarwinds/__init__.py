@@ -1,7 +1,11 @@
-from typing import List, Union
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, List, Optional, Union
 
+import solarwinds.defaults as d
 from solarwinds.api import API
-from solarwinds.models.orion import Orion
+
+if TYPE_CHECKING:
+    from solarwinds.models.orion import Orion
 
 
 class SolarWinds:
@@ -12,6 +16,12 @@ class SolarWinds:
         password: str,
         verify: Union[bool, str] = False,
         timeout: int = 60,
+        retries: int = d.API_CONNECT_RETRIES,
+        http2: bool = False,
+        max_retries: int = d.API_MAX_RETRIES,
+        backoff: float = d.API_RETRY_BACKOFF,
+        cache: Optional[Any] = None,
+        cache_ttl: float = d.API_CACHE_TTL,
     ):
         self.api = API(
             hostname=hostname,
@@ -19,27 +29,36 @@ class SolarWinds:
             password=password,
             verify=verify,
             timeout=timeout,
+            retries=retries,
+            http2=http2,
+            max_retries=max_retries,
+            backoff=backoff,
+            cache=cache,
+            cache_ttl=cache_ttl,
         )
-        self.orion = Orion(self.api)
+
+    @cached_property
+    def orion(self) -> "Orion":
+        # the endpoint modules are only imported once Orion is first used
+        from solarwinds.models.orion import Orion
+
+        return Orion(self.api)
 
     def query(self, query: str) -> List:
         return self.api.query(query)
 
+    def close(self) -> None:
+        self.api.close()
+
+    def __enter__(self) -> "SolarWinds":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
 
-def api(
-    hostname: str,
-    username: str,
-    password: str,
-    verify: Union[bool, str] = False,
-    timeout: int = 60,
-):
-    return SolarWinds(
-        hostname=hostname,
-        username=username,
-        password=password,
-        verify=verify,
-        timeout=timeout,
-    )
+# older entry point, kept for existing callers
+api = SolarWinds
 
 
 __all__ = ["SolarWinds"]
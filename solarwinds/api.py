@@ -1,9 +1,17 @@
+import asyncio
+import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import httpx
 
+import solarwinds.defaults as d
 from solarwinds.exceptions import SWISError
 from solarwinds.utils import parse_response
 
@@ -15,7 +23,70 @@ def _json_serial(obj):
         return serial
 
 
+try:
+    # optional, faster JSON: pip install solarwinds[fast]
+    import orjson
+
+    _loads = orjson.loads
+    # orjson encodes datetimes itself and calls `default` only for types it
+    # can't; partial keeps the call in C, with no Python wrapper frame
+    _dumps = partial(orjson.dumps, default=_json_serial)
+
+except ImportError:
+    _loads = json.loads
+    # built once and reused for every request body
+    _dumps = json.JSONEncoder(default=_json_serial, separators=(",", ":")).encode
+
+
+try:
+    # optional, incremental parsing for stream_query(): pip install solarwinds[stream]
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _base_url(hostname: str) -> str:
+    return f"https://{hostname}:17778/SolarWinds/InformationService/v3/Json/"
+
+
+def _idempotent(method: str, frag: str) -> bool:
+    """Queries and reads don't change data, so they're safe to cache and repeat"""
+    return method == "GET" or frag == "Query"
+
+
+def _copy_rows(rows: Optional[List[Dict]]) -> Optional[List[Dict]]:
+    """Cached rows are shared, so callers get their own copies"""
+    if rows is None:
+        return None
+    return [dict(row) for row in rows]
+
+
+# pooled clients shared by API instances with identical settings, so opening
+# several APIs to one server reuses warm connections. Values are
+# [client, number of APIs using it].
+_shared_clients: Dict[tuple, list] = {}
+_shared_clients_lock = threading.Lock()
+
+
 class API:
+    __slots__ = (
+        "_hostname",
+        "url",
+        "max_retries",
+        "backoff",
+        "cache",
+        "cache_ttl",
+        "_username",
+        "_parsed",
+        "_parsed_lock",
+        "_cache_generation",
+        "_client_args",
+        "_transport_args",
+        "_client_key",
+        "client",
+        "_async_client",
+    )
+
     def __init__(
         self,
         hostname: str,
@@ -23,33 +94,289 @@ class API:
         password: str,
         verify: Union[bool, str] = True,
         timeout: int = 60,
+        retries: int = d.API_CONNECT_RETRIES,
+        http2: bool = False,
+        max_retries: int = d.API_MAX_RETRIES,
+        backoff: float = d.API_RETRY_BACKOFF,
+        cache: Optional[Any] = None,
+        cache_ttl: float = d.API_CACHE_TTL,
     ):
         self.hostname = hostname
-        self.client = httpx.Client(
-            auth=(username, password),
-            timeout=httpx.Timeout(timeout),
-            headers={b"Content-Type": b"application/json"},
-            limits=httpx.Limits(max_keepalive_connections=None, max_connections=None),
-            verify=verify,
+        self._username = username
+        # transient failures are retried with exponential backoff; connect
+        # errors are also retried by the transport itself (`retries`)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # optional response cache, a diskcache.Cache (pip install
+        # solarwinds[cache]), which also keeps responses between runs.
+        # Queries and reads are cached for cache_ttl seconds; any other
+        # request may change data, so it evicts this API's entries.
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        # parsed query results by cache key, as (expiry time, rows), so
+        # repeated queries skip JSON parsing as well as the round trip
+        self._parsed: "OrderedDict[str, Tuple[float, Optional[List]]]" = OrderedDict()
+        self._parsed_lock = threading.Lock()
+        # bumped by invalidate(), so a response fetched before a write
+        # finished is not cached after it
+        self._cache_generation = 0
+        # http2 multiplexes concurrent requests over one connection; it needs
+        # the h2 package: pip install solarwinds[http2]
+        self._client_args = {
+            "auth": (username, password),
+            "timeout": httpx.Timeout(timeout),
+            "headers": {b"Content-Type": b"application/json"},
+        }
+        self._transport_args = {
+            "verify": verify,
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_keepalive_connections=d.API_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=d.API_MAX_CONNECTIONS,
+                keepalive_expiry=d.API_KEEPALIVE_EXPIRY,
+            ),
+            "retries": retries,
+        }
+        # every model and endpoint uses this client through their `api`
+        # reference, and APIs opened with the same settings share it too.
+        # The credentials are keyed by their hash, so the module-level pool
+        # table doesn't hold on to the password.
+        self._client_key = (
+            hostname,
+            username,
+            hashlib.blake2b(f"{username}\0{password}".encode()).hexdigest(),
+            verify,
+            timeout,
+            retries,
+            http2,
         )
+        with _shared_clients_lock:
+            shared = _shared_clients.get(self._client_key)
+            if shared is None or shared[0].is_closed:
+                client = httpx.Client(
+                    **self._client_args,
+                    transport=httpx.HTTPTransport(**self._transport_args),
+                )
+                shared = _shared_clients[self._client_key] = [client, 0]
+            shared[1] += 1
+        self.client = shared[0]
+        self._async_client = None
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Pooled client for the a* methods, created on first use"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                **self._client_args,
+                transport=httpx.AsyncHTTPTransport(**self._transport_args),
+            )
+        return self._async_client
+
+    @property
+    def hostname(self) -> str:
+        return self._hostname
+
+    @hostname.setter
+    def hostname(self, hostname: str) -> None:
+        # the base url is rebuilt here rather than per request
+        self._hostname = hostname
+        self.url = _base_url(hostname)
 
     @property
-    def url(self) -> str:
-        return f"https://{self.hostname}:17778/SolarWinds/InformationService/v3/Json/"
+    def connection(self) -> str:
+        """
+        user@host this API talks to. Cached responses are tagged with it,
+        and other caches of per-connection data key on it.
+        """
+        return f"{self._username}@{self._hostname}"
+
+    def close(self) -> None:
+        """
+        Release the connection pool. It is closed once no other API
+        shares it.
+        """
+        with _shared_clients_lock:
+            key, self._client_key = self._client_key, None
+            if key is None:
+                # already released
+                return
+            shared = _shared_clients.get(key)
+            if shared is not None and shared[0] is self.client:
+                shared[1] -= 1
+                if shared[1]:
+                    return
+                del _shared_clients[key]
+        self.client.close()
+
+    async def aclose(self) -> None:
+        """Release both connection pools"""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def __enter__(self) -> "API":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
     def query(self, query: str, **params) -> List:
-        return parse_response(
-            self._req("POST", "Query", {"query": query, "parameters": params}).json()
+        content = _dumps({"query": query, "parameters": params})
+        if self.cache is None or self.cache_ttl <= 0:
+            response = self._req("POST", "Query", content=content)
+            return parse_response(_loads(response.content))
+
+        key = self._cache_key("POST", "Query", content)
+        with self._parsed_lock:
+            cached = self._parsed.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._parsed.move_to_end(key)
+                return _copy_rows(cached[1])
+            generation = self._cache_generation
+        body, expires = self.cache.get(key, expire_time=True)
+        if body is None:
+            body = self._send("POST", "Query", content).content
+            self._cache_store(key, body, generation)
+            ttl = self.cache_ttl
+        else:
+            # a copy parsed from a disk entry expires along with it
+            ttl = self.cache_ttl if expires is None else expires - time.time()
+        rows = parse_response(_loads(body))
+        with self._parsed_lock:
+            if generation == self._cache_generation:
+                self._parsed[key] = (time.monotonic() + ttl, rows)
+                self._parsed.move_to_end(key)
+                while len(self._parsed) > d.API_PARSED_CACHE_SIZE:
+                    self._parsed.popitem(last=False)
+        return _copy_rows(rows)
+
+    async def aquery(self, query: str, **params) -> List:
+        response = await self._areq(
+            "POST", "Query", {"query": query, "parameters": params}
         )
+        return parse_response(_loads(response.content))
 
-    def invoke(self, entity: str, verb: str, *args) -> Dict:
-        return self._req("POST", f"Invoke/{entity}/{verb}", args).json()
+    def query_one(self, query: str, **params) -> Optional[Dict]:
+        """
+        Return the first row of a query, or None if it returned no rows
+        """
+        rows = self.query(query, **params)
+        return rows[0] if rows else None
+
+    def iter_query(
+        self, query: str, page_size: Optional[int] = None, **params
+    ) -> Iterator[Dict]:
+        """
+        Yield the rows of a query one page at a time, using SWQL's
+        WITH ROWS clause, so large result sets are never held in memory at
+        once. The query should have an ORDER BY so pages are stable.
+        """
+        page_size = page_size or d.QUERY_PAGE_SIZE
+        start = 1
+        while True:
+            end = start + page_size - 1
+            rows = self.query(f"{query} WITH ROWS {start} TO {end}", **params)
+            if not rows:
+                return
+            yield from rows
+            if len(rows) < page_size:
+                return
+            start = end + 1
+
+    def stream_query(
+        self, query: str, incremental: Optional[bool] = None, **params
+    ) -> Iterator[Dict]:
+        """
+        Yield the rows of a query as the response body arrives. With ijson
+        installed (pip install solarwinds[stream]), rows are parsed
+        incrementally and the full result is never held in memory; without
+        it, the body is parsed in one go. Pass incremental=True to require
+        ijson, or False to always parse in one go.
+        """
+        if incremental and ijson is None:
+            raise ImportError(
+                "stream_query(incremental=True) needs ijson: "
+                "pip install solarwinds[stream]"
+            )
+        if incremental is None:
+            incremental = ijson is not None
+        return self._stream_query(query, params, incremental)
+
+    def _stream_query(self, query: str, params: Dict, incremental: bool):
+        body = _dumps({"query": query, "parameters": params})
+        with self.client.stream("POST", self.url + "Query", content=body) as response:
+            if response.is_error or not incremental:
+                response.read()
+                self._check(response, "POST", "Query")
+                yield from parse_response(_loads(response.content)) or []
+                return
+            rows = ijson.sendable_list()
+            parser = ijson.items_coro(rows, "results.item", use_float=True)
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                yield from rows
+                del rows[:]
+            parser.close()
+            yield from rows
+
+    def invoke(
+        self, entity: str, verb: str, *args, hostname: Optional[str] = None
+    ) -> Dict:
+        """
+        Invoke a SWIS verb. Pass `hostname` to send it to another SWIS host,
+        such as a node's polling engine, over this API's connection pool.
+        """
+        url = _base_url(hostname) if hostname else None
+        frag = f"Invoke/{entity}/{verb}"
+        return _loads(self._req("POST", frag, args, url=url).content)
+
+    async def ainvoke(
+        self, entity: str, verb: str, *args, hostname: Optional[str] = None
+    ) -> Dict:
+        url = _base_url(hostname) if hostname else None
+        response = await self._areq("POST", f"Invoke/{entity}/{verb}", args, url=url)
+        return _loads(response.content)
 
     def create(self, entity: str, **properties) -> Dict:
-        return self._req("POST", f"Create/{entity}", properties).json()
+        return _loads(self._req("POST", f"Create/{entity}", properties).content)
+
+    async def acreate(self, entity: str, **properties) -> Dict:
+        response = await self._areq("POST", f"Create/{entity}", properties)
+        return _loads(response.content)
 
     def read(self, uri: str) -> Dict:
-        return self._req("GET", uri).json()
+        return _loads(self._req("GET", uri).content)
+
+    async def aread(self, uri: str) -> Dict:
+        return _loads((await self._areq("GET", uri)).content)
+
+    def read_many(
+        self, uris: List[str], max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Read many uris concurrently over the shared connection pool. SWIS
+        has no bulk read verb and SWQL can't select every property of an
+        entity, so up to `max_workers` reads are in flight at once.
+        Results are returned in the order given.
+        """
+        max_workers = max_workers or d.API_READ_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.read, uris))
+
+    async def aread_many(self, uris: List[str]) -> List[Dict]:
+        """
+        Like read_many(), over the async client. No more reads are in
+        flight than the connection pool holds, so a long list of uris
+        doesn't time out waiting for a connection.
+        """
+        semaphore = asyncio.Semaphore(d.API_MAX_CONNECTIONS)
+
+        async def read(uri: str) -> Dict:
+            async with semaphore:
+                return await self.aread(uri)
+
+        return list(await asyncio.gather(*(read(uri) for uri in uris)))
 
     def update(self, uris: Union[List[str], str], **properties):
         if isinstance(uris, list):
@@ -72,14 +399,162 @@ class API:
         self.invoke("Orion.Reporting", "ExecuteSQL", statement)
         return True
 
-    def _req(self, method: str, frag: str, data: Optional[Dict] = None):
-        response = self.client.request(
-            method, self.url + frag, data=json.dumps(data, default=_json_serial)
+    def invalidate(self) -> None:
+        """Drop this API's cached responses"""
+        if self.cache is not None:
+            with self._parsed_lock:
+                self._parsed.clear()
+                self._cache_generation += 1
+            self.cache.evict(self.connection)
+
+    def _invalidate_after(self, method: str, frag: str) -> None:
+        """Drop cached responses once a request that may change data is done"""
+        if self.cache is not None and not _idempotent(method, frag):
+            self.invalidate()
+
+    def _req(
+        self,
+        method: str,
+        frag: str,
+        data: Optional[Dict] = None,
+        content: Union[bytes, str, None] = None,
+        url: Optional[str] = None,
+    ):
+        """`url` overrides this API's base url for one request"""
+        if content is None and data is not None:
+            content = _dumps(data)
+        if not _idempotent(method, frag):
+            # invalidated once the write is done, whatever its outcome, so a
+            # query running alongside it can't re-cache the old data
+            try:
+                return self._send(method, frag, content, url)
+            finally:
+                self._invalidate_after(method, frag)
+        if self.cache is None or self.cache_ttl <= 0 or url:
+            return self._send(method, frag, content, url)
+        key = self._cache_key(method, frag, content)
+        generation = self._cache_generation
+        cached = self.cache.get(key)
+        if cached is not None:
+            return httpx.Response(200, content=cached)
+        response = self._send(method, frag, content)
+        self._cache_store(key, response.content, generation)
+        return response
+
+    def _cache_store(self, key: str, body: bytes, generation: int) -> None:
+        """Cache a response, unless the cache was invalidated since it was sent"""
+        with self._parsed_lock:
+            if generation == self._cache_generation:
+                self.cache.set(key, body, expire=self.cache_ttl, tag=self.connection)
+
+    def _send(
+        self,
+        method: str,
+        frag: str,
+        content: Union[bytes, str, None] = None,
+        url: Optional[str] = None,
+    ) -> httpx.Response:
+        request = self.client.request
+        url = (url or self.url) + frag
+        attempt = 0
+        while True:
+            try:
+                response = request(method, url, content=content)
+            except httpx.TransportError:
+                delay = self._retry_delay(method, frag, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(method, frag, attempt, response)
+                if delay is None:
+                    break
+            time.sleep(delay)
+            attempt += 1
+        return self._check(response, method, frag)
+
+    def _cache_key(self, method: str, frag: str, content: Optional[bytes]) -> str:
+        key = hashlib.blake2b(digest_size=20)
+        for part in (self.connection, method, self.url, frag):
+            key.update(part.encode())
+            key.update(b"\0")
+        if content:
+            key.update(content if isinstance(content, bytes) else content.encode())
+        return key.hexdigest()
+
+    async def _areq(
+        self,
+        method: str,
+        frag: str,
+        data: Optional[Dict] = None,
+        url: Optional[str] = None,
+    ):
+        content = _dumps(data) if data is not None else None
+        request = self.async_client.request
+        url = (url or self.url) + frag
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = await request(method, url, content=content)
+                except httpx.TransportError:
+                    delay = self._retry_delay(method, frag, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    delay = self._retry_delay(method, frag, attempt, response)
+                    if delay is None:
+                        break
+                await asyncio.sleep(delay)
+                attempt += 1
+            return self._check(response, method, frag)
+        finally:
+            self._invalidate_after(method, frag)
+
+    def _retry_delay(
+        self,
+        method: str,
+        frag: str,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying, or None if the request shouldn't be
+        retried. Only queries and reads are safe to repeat after an unknown
+        outcome, so writes are retried only when SWIS turned them away.
+        """
+        if attempt >= self.max_retries:
+            return None
+        idempotent = _idempotent(method, frag)
+        if response is None:
+            if not idempotent:
+                return None
+        elif response.status_code not in d.API_RETRY_STATUSES:
+            return None
+        elif not idempotent and response.status_code not in d.API_RETRY_ANY_STATUSES:
+            return None
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
         )
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self.backoff * 2**attempt
+        return min(delay, d.API_RETRY_MAX_DELAY)
 
+    def _check(self, response: httpx.Response, method: str, frag: str):
         if 400 <= response.status_code < 600:
-            error_msg = response.json().get("FullException")
-            msg = f"{method} to {self.url + frag} returned {response.status_code}\n"
+            # parsed once; proxies in front of SWIS may send empty or
+            # non-JSON error bodies, which just leave error_msg unset
+            try:
+                body = _loads(response.content) if response.content else {}
+            except ValueError:
+                body = {}
+            if not isinstance(body, dict):
+                body = {}
+            error_msg = body.get("FullException") or body.get("Message")
+            msg = (
+                f"{method} to {response.request.url} returned {response.status_code}\n"
+            )
             if error_msg:
                 msg = msg + "Full exception returned by SWIS:\n" + error_msg
             raise SWISError(msg)
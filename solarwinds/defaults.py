@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 # defaults based on:
 # https://github.com/solarwinds/orionsdk-python/blob/master/samples/discover_one_node.py
 NODE_DISCOVERY_JOB_TIMEOUT_SECONDS = 120
@@ -13,26 +15,30 @@ NODE_DISCOVERY_ALLOW_DUPLICATE_NODES = False
 NODE_DISCOVERY_IS_AUTO_IMPORT = True
 NODE_DISCOVERY_IS_HIDDEN = False
 
-NODE_DEFAULT_POLLERS = {
-    "icmp": [
-        "N.Status.ICMP.Native",
-        "N.ResponseTime.ICMP.Native",
-    ],
-    "snmp": [
-        "N.Status.ICMP.Native",
-        "N.ResponseTime.ICMP.Native",
-        "N.AssetInventory.Snmp.Generic",
-        "N.Cpu.SNMP.HrProcessorLoad",
-        "N.Details.SNMP.Generic",
-        "N.Memory.SNMP.NetSnmpReal",
-        "N.ResponseTime.SNMP.Native",
-        "N.Routing.SNMP.Ipv4CidrRoutingTable",
-        "N.Topology_Layer3.SNMP.ipNetToMedia",
-        "N.Uptime.SNMP.Generic",
-    ],
-}
-
-NODE_CISCO_POLLERS = [
+NODE_ICMP_POLLERS = (
+    "N.Status.ICMP.Native",
+    "N.ResponseTime.ICMP.Native",
+)
+NODE_SNMP_POLLERS = (
+    "N.Status.ICMP.Native",
+    "N.ResponseTime.ICMP.Native",
+    "N.AssetInventory.Snmp.Generic",
+    "N.Cpu.SNMP.HrProcessorLoad",
+    "N.Details.SNMP.Generic",
+    "N.Memory.SNMP.NetSnmpReal",
+    "N.ResponseTime.SNMP.Native",
+    "N.Routing.SNMP.Ipv4CidrRoutingTable",
+    "N.Topology_Layer3.SNMP.ipNetToMedia",
+    "N.Uptime.SNMP.Generic",
+)
+NODE_DEFAULT_POLLERS = MappingProxyType(
+    {
+        "icmp": NODE_ICMP_POLLERS,
+        "snmp": NODE_SNMP_POLLERS,
+    }
+)
+
+NODE_CISCO_POLLERS = (
     "N.Cpu.SNMP.CiscoGen3",
     "N.Details.SNMP.Generic",
     "N.EnergyWise.SNMP.Cisco",
@@ -56,15 +62,63 @@ NODE_CISCO_POLLERS = [
     "N.Topology_Vlans.SNMP.VtpVlan",
     "N.Uptime.SNMP.Generic",
     "N.VRFRouting.SNMP.MPLSVPNStandard",
-]
+)
 
-EXCLUDE_CUSTOM_PROPS = [
-    "DisplayName",
-    "NodeID",
-    "InstanceType",
-    "Uri",
-    "InstanceSiteId",
-    "Description",
-]
+EXCLUDE_CUSTOM_PROPS = frozenset(
+    {
+        "DisplayName",
+        "NodeID",
+        "InstanceType",
+        "Uri",
+        "InstanceSiteId",
+        "Description",
+    }
+)
 
 IMPORT_RESOURCES_TIMEOUT = 30
+
+# max nodes created concurrently by Orion.create_nodes()
+NODE_CREATE_MAX_WORKERS = 16
+
+# rows fetched per request by API.iter_query()
+QUERY_PAGE_SIZE = 1000
+
+# credential lookups cached by Orion.credential.get()
+CREDENTIAL_CACHE_SIZE = 128
+
+# seconds a cached credential lookup is trusted before it is queried again,
+# so rotated or removed credentials are eventually picked up
+CREDENTIAL_CACHE_TTL = 300
+
+# max credentials created concurrently by Orion.credential.create_many()
+CREDENTIAL_CREATE_MAX_WORKERS = 16
+
+# max uris read concurrently by API.read_many()
+API_READ_MAX_WORKERS = 16
+
+# connection attempts retried by the HTTP transport (connect errors only)
+API_CONNECT_RETRIES = 3
+
+# retries of requests that failed with a transient error, and the base delay
+# in seconds (doubled each attempt) when the server sends no Retry-After
+API_MAX_RETRIES = 3
+API_RETRY_BACKOFF = 0.3
+# statuses worth retrying; 429 and 503 mean SWIS did not handle the request,
+# so those are retried for writes too, the rest only for queries and reads
+API_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+API_RETRY_ANY_STATUSES = frozenset({429, 503})
+# longest wait between retries in seconds, whatever Retry-After asks for
+API_RETRY_MAX_DELAY = 30.0
+
+# seconds an idle pooled connection is kept open (httpx defaults to 5)
+API_KEEPALIVE_EXPIRY = 30.0
+
+# connection pool size, shared by the sync and async clients' settings
+API_MAX_CONNECTIONS = 64
+API_MAX_KEEPALIVE_CONNECTIONS = 32
+
+# seconds query and read responses are kept when API is given a response cache
+API_CACHE_TTL = 60.0
+
+# parsed query results kept in memory in front of that cache
+API_PARSED_CACHE_SIZE = 256
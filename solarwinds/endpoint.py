@@ -3,6 +3,7 @@ from typing import Any, Dict, Optional, Union
 from solarwinds.defaults import EXCLUDE_CUSTOM_PROPS
 from solarwinds.exceptions import (
     SWIDNotFound,
+    SWNonUniqueResult,
     SWObjectDoesNotExist,
     SWObjectExists,
     SWObjectPropertyError,
@@ -12,6 +13,19 @@ from solarwinds.utils import print_dict, sanitize_swdata
 
 logger = get_logger(__name__)
 
+# URI lookup query, formatted once per (endpoint, key) pair when an Endpoint
+# subclass is defined; the value is bound as a parameter per call. The object's id
+# is selected alongside the uri so it doesn't need a separate round-trip.
+# Unique keys only need TOP 1; for other keys TOP 2 is enough to tell a unique
+# match from an ambiguous one. Classes sharing an entity with other types (e.g.
+# credentials) can narrow the lookup with _swquery_filter, binding any values it
+# needs through _swquery_params. The filter leads the WHERE clause so that a
+# composite index on (filter column, key) matches in key order.
+URI_QUERY = (
+    "SELECT TOP {top} Uri as uri, {id_key} as id FROM {endpoint} "
+    "WHERE {filter}{key} = @value"
+)
+
 
 class Endpoint:
 
@@ -22,16 +36,44 @@ class Endpoint:
     _id_attr = None
     _swid_key = None
     _swquery_attrs = None
+    _swunique_attrs = None
+    _swquery_filter = None
+    _swquery_params = None
     _swargs_attrs = None
     _required_swargs_attrs = None
     _child_objects = None
+    _exclude_custom_props = EXCLUDE_CUSTOM_PROPS
+    _uri_queries = None
+    # names of the _init* hooks, collected once per class
+    _on_init_methods = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._on_init_methods = tuple(x for x in dir(cls) if x.startswith("_init"))
+        if cls.endpoint and cls._swquery_attrs and cls._attr_map and cls._swid_key:
+            unique_attrs = cls._swunique_attrs or ()
+            cls._uri_queries = tuple(
+                (
+                    attr,
+                    URI_QUERY.format(
+                        top=1 if attr in unique_attrs else 2,
+                        endpoint=cls.endpoint,
+                        id_key=cls._swid_key,
+                        key=cls._attr_map[attr],
+                        filter=(
+                            f"{cls._swquery_filter} AND " if cls._swquery_filter else ""
+                        ),
+                    ),
+                )
+                for attr in cls._swquery_attrs
+            )
 
     def __init__(self):
-        self.uri = None
+        # subclasses may pre-seed a known uri to skip the lookup query
+        self.uri = getattr(self, "uri", None)
         self._exists = False
         self._extra_swargs = None
         self._changes = None
-        self._exclude_custom_props = EXCLUDE_CUSTOM_PROPS
         self._child_objects = None
         self._schema_version = "2020.2"
         self._swdata = {"properties": {}, "custom_properties": {}}
@@ -44,9 +86,8 @@ class Endpoint:
         self._update_attrs_from_children()
 
     def _call_init_methods(self):
-        init_methods = [getattr(self, x) for x in dir(self) if x.startswith("_init")]
-        for method in init_methods:
-            method()
+        for name in self._on_init_methods:
+            getattr(self, name)()
 
     def _resolve_endpoint_attrs(self) -> None:
         if self._endpoint_attrs:
@@ -111,34 +152,32 @@ class Endpoint:
         Get object's SWIS URI
         """
         if not self.uri or refresh:
-            if not self._swquery_attrs:
+            if not self._uri_queries:
                 raise SWObjectPropertyError("Missing required property: _swquery_attrs")
             logger.debug("uri is not set or refresh is True, updating...")
-            queries = []
-            for attr in self._swquery_attrs:
+            queried = False
+            params = self._swquery_params or {}
+            for attr, query in self._uri_queries:
                 v = getattr(self, attr)
                 if v:
-                    k = self._attr_map[attr]
-                    queries.append(
-                        f"SELECT Uri as uri FROM {self.endpoint} WHERE {k} = '{v}'"
-                    )
-            if queries:
-                query_lines = "\n".join(queries)
-                logger.debug(f"built SWQL queries:\n{query_lines}")
-                for query in queries:
-                    result = self.api.query(query)
+                    queried = True
+                    result = self.api.query(query, value=v, **params)
                     if result:
+                        if len(result) > 1:
+                            raise SWNonUniqueResult(
+                                f"found more than one {self._type} where {attr} = {v}"
+                            )
                         uri = result[0]["uri"]
                         logger.debug(f"found uri: {uri}")
                         self.uri = uri
+                        self._set_id(result[0]["id"])
                         return uri
-                return None
-            else:
+            if not queried:
                 key_attrs = ", ".join(self._swquery_attrs)
                 logger.debug(
                     f"Can't get uri, one of these key attributes must be set: {key_attrs}"
                 )
-                return None
+            return None
         else:
             logger.debug("self.uri is set and refresh is False, returning cached value")
             return self.uri
@@ -147,6 +186,9 @@ class Endpoint:
         """
         Whether or not object exists
         """
+        if self.uri and not refresh:
+            self._exists = True
+            return True
         self._exists = bool(self._get_uri(refresh=refresh))
         return self._exists
 
@@ -163,13 +205,18 @@ class Endpoint:
             ) or refresh:
                 swdata = {"properties": None, "custom_properties": None}
                 logger.debug("getting object data from solarwinds...")
+                keys = []
                 if data == "both" or data == "properties":
-                    swdata["properties"] = sanitize_swdata(self.api.read(self.uri))
+                    keys.append(("properties", self.uri))
                 if data == "both" or data == "custom_properties":
                     if hasattr(self, "custom_properties"):
-                        swdata["custom_properties"] = sanitize_swdata(
-                            self.api.read(f"{self.uri}/CustomProperties")
+                        keys.append(
+                            ("custom_properties", f"{self.uri}/CustomProperties")
                         )
+                # read one after the other: a pool for two GETs costs more than
+                # it saves, and bulk callers already parallelize across objects
+                for key, uri in keys:
+                    swdata[key] = sanitize_swdata(self.api.read(uri))
                 if swdata.get("properties") or swdata.get("custom_properties"):
                     self._swdata = swdata
             else:
@@ -334,20 +381,27 @@ class Endpoint:
                         child_value = getattr(child, child_attr)
                         local_value = getattr(self, local_attr)
                         if local_value != child_value or overwrite is True:
-                            attr_updates.update({local_attr: child_value})
+                            attr_updates[local_attr] = child_value
                             logger.debug(
                                 f"updated self.{local_attr} = {child_value} from child attr {child_attr}"
                             )
                     self._update_attrs(attr_updates=attr_updates)
 
-    def _build_swargs(self) -> None:
-        swargs = {"properties": None, "custom_properties": None}
+    def _get_swargs_properties(self) -> Dict:
+        """
+        Map local attributes to SWIS properties. Overridden in subclasses.
+        """
         properties = {}
-        custom_properties = {}
-        for attr, swarg in self._swargs_attrs.items():
+        for attr in self._swargs_attrs:
             value = getattr(self, attr)
-            properties[swarg] = value
+            properties[self._attr_map[attr]] = value
             logger.debug(f'_swargs["properties"]["{attr}"] = {value}')
+        return properties
+
+    def _build_swargs(self) -> None:
+        swargs = {"properties": None, "custom_properties": None}
+        properties = self._get_swargs_properties()
+        custom_properties = {}
 
         extra_swargs = self._get_extra_swargs()
         if extra_swargs:
@@ -450,14 +504,19 @@ class Endpoint:
         else:
             logger.debug("no changes found")
 
-    def _get_id(self) -> None:
-        if not self._swdata:
-            self._get_swdata()
-        sw_id = self._swdata["properties"].get(self._swid_key)
+    def _set_id(self, sw_id: Optional[int]) -> None:
         if sw_id:
             self.id = sw_id
             setattr(self, self._id_attr, sw_id)
             logger.debug(f"got solarwinds object id {self.id}")
+
+    def _get_id(self) -> int:
+        if not self._swdata:
+            self._get_swdata()
+        sw_id = self._swdata["properties"].get(self._swid_key)
+        if sw_id:
+            self._set_id(sw_id)
+            return sw_id
         else:
             raise SWIDNotFound(
                 f'could not find id value in _swdata["properties"]["{self._swid_key}"]'
@@ -477,6 +536,9 @@ class Endpoint:
                     raise SWObjectPropertyError(f"Missing required attribute: {attr}")
 
             self.uri = self.api.create(self.endpoint, **self._swargs["properties"])
+            # custom properties live on a separate entity (e.g.
+            # Orion.NodesCustomProperties) that SWIS's Create verb won't
+            # accept, so they can only be written with a follow-up update
             if self._swargs.get("custom_properties"):
                 self.api.update(
                     f"{self.uri}/CustomProperties",
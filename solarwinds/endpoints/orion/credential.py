@@ -1,8 +1,125 @@
-from typing import Dict, Literal, Optional
+import sys
+import threading
+from collections import OrderedDict
+from time import monotonic
+from types import MappingProxyType
+from typing import Dict, Final, Literal, Optional, Tuple
 
+import solarwinds.defaults as d
 from solarwinds.api import API
 from solarwinds.endpoint import Endpoint
-from solarwinds.exceptions import SWObjectExists
+from solarwinds.exceptions import SWNonUniqueResult, SWObjectExists
+
+# fully-qualified Orion.Credential.CredentialType values, interned once at import.
+# This is the only place these strings are spelled out: lookup filters and the
+# Credential.get dispatch table derive from them, so add new types here (also
+# through sys.intern) rather than inline.
+CREDENTIAL_TYPE_SNMPV2: Final = sys.intern(
+    "SolarWinds.Orion.Core.Models.Credentials.SnmpCredentialsV2"
+)
+CREDENTIAL_TYPE_SNMPV3: Final = sys.intern(
+    "SolarWinds.Orion.Core.Models.Credentials.SnmpCredentialsV3"
+)
+CREDENTIAL_TYPE_USERPASS: Final = sys.intern(
+    "SolarWinds.Orion.Core.SharedCredentials.Credentials.UsernamePasswordCredential"
+)
+
+CREDENTIAL_COLUMNS = "ID, Name, Description, CredentialType, CredentialOwner, Uri"
+CREDENTIAL_QUERY = f"SELECT {CREDENTIAL_COLUMNS} FROM Orion.Credential"
+# full lookup statements, built once at import; only the bound value varies.
+# IDs are unique; for names, two rows are enough to detect an ambiguous match
+CREDENTIAL_QUERY_BY = MappingProxyType(
+    {
+        "id": f"SELECT TOP 1 {CREDENTIAL_COLUMNS} FROM Orion.Credential "
+        "WHERE ID = @value",
+        "name": f"SELECT TOP 2 {CREDENTIAL_COLUMNS} FROM Orion.Credential "
+        "WHERE Name = @value",
+    }
+)
+
+# ID-only lookups, for callers that just need to reference a credential.
+# Typed lookups (here and in the endpoint URI queries) put CredentialType
+# first, matching a (CredentialType, Name) index if the database has one.
+CREDENTIAL_ID_QUERY = "SELECT TOP 2 ID FROM Orion.Credential WHERE Name = @value"
+CREDENTIAL_TYPED_ID_QUERY = (
+    "SELECT TOP 2 ID FROM Orion.Credential "
+    "WHERE CredentialType = @credential_type AND Name = @value"
+)
+
+
+def _lookup_credential(api: API, key: str, value) -> Optional[Dict]:
+    rows = api.query(CREDENTIAL_QUERY_BY[key], value=value)
+    if not rows:
+        return None
+    if len(rows) > 1:
+        raise SWNonUniqueResult(f"found more than one credential where {key} = {value}")
+    return rows[0]
+
+
+# Credentials rarely change, so lookups are cached for CREDENTIAL_CACHE_TTL
+# seconds, as (expiry time, row) by (user@host, key, value). Keying on the
+# connection rather than the API object keeps the cache from holding APIs,
+# and their clients, alive. clear_credential_cache() is called whenever a
+# credential is created, changed or deleted.
+_credential_rows: "OrderedDict[Tuple, Tuple[float, Optional[Dict]]]" = OrderedDict()
+_credential_rows_lock = threading.Lock()
+# bumped by clear_credential_cache(), so a lookup that was in flight when a
+# credential changed isn't cached, and caches built on these lookups can tell
+_credential_generation = 0
+
+
+def query_credential(api: API, key: str, value, cache: bool = True) -> Optional[Dict]:
+    """
+    Look up a credential row by "id" or "name"
+    """
+    if not cache:
+        return _lookup_credential(api, key, value)
+    cache_key = (api.connection, key, value)
+    with _credential_rows_lock:
+        cached = _credential_rows.get(cache_key)
+        if cached is not None and cached[0] > monotonic():
+            _credential_rows.move_to_end(cache_key)
+            return cached[1]
+        generation = _credential_generation
+    row = _lookup_credential(api, key, value)
+    with _credential_rows_lock:
+        if generation == _credential_generation:
+            _credential_rows[cache_key] = (monotonic() + d.CREDENTIAL_CACHE_TTL, row)
+            _credential_rows.move_to_end(cache_key)
+            while len(_credential_rows) > d.CREDENTIAL_CACHE_SIZE:
+                _credential_rows.popitem(last=False)
+    return row
+
+
+def query_credential_id(
+    api: API, name: str, credential_type: Optional[str] = None
+) -> Optional[int]:
+    """
+    Look up just the ID of the credential `name`, optionally of one type
+    """
+    if credential_type:
+        rows = api.query(
+            CREDENTIAL_TYPED_ID_QUERY, value=name, credential_type=credential_type
+        )
+    else:
+        rows = api.query(CREDENTIAL_ID_QUERY, value=name)
+    if not rows:
+        return None
+    if len(rows) > 1:
+        raise SWNonUniqueResult(f"found more than one credential where name = {name}")
+    return rows[0]["ID"]
+
+
+def credential_generation() -> int:
+    """Changes whenever clear_credential_cache() is called"""
+    return _credential_generation
+
+
+def clear_credential_cache() -> None:
+    global _credential_generation
+    with _credential_rows_lock:
+        _credential_rows.clear()
+        _credential_generation += 1
 
 
 class OrionCredential(Endpoint):
@@ -15,10 +132,15 @@ class OrionCredential(Endpoint):
     }
     _swid_key = "ID"
     _swquery_attrs = ["id", "name"]
+    _swunique_attrs = ["id"]
     _swargs_attrs = ["id", "name"]
+    credential_type = None
+    # Orion.Credential verbs used by create() and save(), set in subclasses
+    _create_verb = None
+    _update_verb = None
 
     def __init__(self) -> None:
-        if not self.id and not self.name:
+        if self.id is None and not self.name:
             raise ValueError("must provide either credential ID or name")
         super().__init__()
 
@@ -32,16 +154,82 @@ class OrionCredential(Endpoint):
             "name": self._swp.get("Name"),
         }
 
-    def __repr__(self):
-        return f"<OrionCredential: {self.name or self.id}>"
+    def _validate(self) -> None:
+        if not self.name:
+            raise ValueError("Must provide credential name.")
+
+    def _verb_args(self) -> Tuple:
+        """
+        Arguments shared by the create and update verbs. Overridden in subclasses.
+        """
+        return (self.name,)
+
+    def create(self) -> bool:
+        if self.exists():
+            raise SWObjectExists()
+        self._validate()
+        self.id = self.api.invoke(
+            self.endpoint, self._create_verb, *self._verb_args(), self.owner
+        )
+        # we already know everything the row would hold, so don't read it back
+        self._swdata["properties"] = {
+            "ID": self.id,
+            "Name": self.name,
+            "Description": self.description,
+            "CredentialType": self.credential_type,
+            "CredentialOwner": self.owner,
+        }
+        clear_credential_cache()
+        return True
+
+    def save(self) -> bool:
+        if not self.exists():
+            return self.create()
+        self._validate()
+        self.api.invoke(self.endpoint, self._update_verb, self.id, *self._verb_args())
+        clear_credential_cache()
+        return True
+
+    def delete(self) -> bool:
+        deleted = super().delete()
+        if deleted:
+            clear_credential_cache()
+        return deleted
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name or self.id}>"
 
     def __str__(self) -> str:
         return self.name
 
 
 class OrionSNMPv3Credential(OrionCredential):
-    VALID_AUTH_METHODS = [None, "md5", "sha1", "sha256", "sha512"]
-    VALID_PRIV_METHODS = [None, "des56", "aes128", "aes192", "aes256"]
+    credential_type = CREDENTIAL_TYPE_SNMPV3
+    _swquery_filter = "CredentialType = @credential_type"
+    _swquery_params = MappingProxyType({"credential_type": credential_type})
+    _create_verb = "CreateSNMPv3Credentials"
+    _update_verb = "UpdateSNMPv3Credentials"
+    # method names as the SWIS credential verbs expect them
+    AUTH_METHODS = MappingProxyType(
+        {
+            None: "None",
+            "md5": "MD5",
+            "sha1": "SHA1",
+            "sha256": "SHA256",
+            "sha512": "SHA512",
+        }
+    )
+    PRIV_METHODS = MappingProxyType(
+        {
+            None: "None",
+            "des56": "DES56",
+            "aes128": "AES128",
+            "aes192": "AES192",
+            "aes256": "AES256",
+        }
+    )
+    VALID_AUTH_METHODS = list(AUTH_METHODS)
+    VALID_PRIV_METHODS = list(PRIV_METHODS)
 
     def __init__(
         self,
@@ -58,8 +246,10 @@ class OrionSNMPv3Credential(OrionCredential):
         priv_method: Optional[Literal["des56", "aes128", "aes192", "aes256"]] = None,
         priv_password: str = "",
         priv_key_is_password: bool = False,
+        uri: Optional[str] = None,
     ) -> None:
         self.api = api
+        self.uri = uri
         self.id = id
         self.name = name
         self.owner = owner
@@ -75,61 +265,35 @@ class OrionSNMPv3Credential(OrionCredential):
         super().__init__()
 
     def _validate(self) -> None:
-        if not self.name:
-            raise ValueError("Must provide credential name.")
+        super()._validate()
         if not self.username:
             raise ValueError("Must provide username.")
-        if self.auth_method not in self.VALID_AUTH_METHODS:
+        if self.auth_method not in self.AUTH_METHODS:
             raise ValueError(f"auth_method must be: {self.VALID_AUTH_METHODS}")
-        if self.priv_method not in self.VALID_PRIV_METHODS:
+        if self.priv_method not in self.PRIV_METHODS:
             raise ValueError(f"priv_method must be: {self.VALID_PRIV_METHODS}")
 
-    def create(self) -> bool:
-        if self.exists():
-            raise SWObjectExists
-        self._validate()
-        self.id = self.api.invoke(
-            self.endpoint,
-            "CreateSNMPv3Credentials",
+    def _verb_args(self) -> Tuple:
+        return (
             self.name,
             self.username,
             self.context,
-            self.auth_method.upper() if self.auth_method else "None",
+            self.AUTH_METHODS[self.auth_method],
             self.auth_password,
             not self.auth_key_is_password,  # AFAICT, the SWIS API has this flag inverted
-            self.priv_method.upper() if self.priv_method else "None",
+            self.PRIV_METHODS[self.priv_method],
             self.priv_password,
             not self.priv_key_is_password,  # AFAICT, the SWIS API has this flag inverted
-            self.owner,
         )
-        return True
-
-    def save(self) -> bool:
-        if not self.exists():
-            return self.create()
-        else:
-            self._validate()
-            self.api.invoke(
-                self.endpoint,
-                "UpdateSNMPv3Credentials",
-                self.id,
-                self.name,
-                self.username,
-                self.context,
-                self.auth_method.upper() if self.auth_method else "None",
-                self.auth_password,
-                not self.auth_key_is_password,  # AFAICT, the SWIS API has this flag inverted
-                self.priv_method.upper() if self.priv_method else "None",
-                self.priv_password,
-                not self.priv_key_is_password,  # AFAICT, the SWIS API has this flag inverted
-            )
-            return True
-
-    def __repr__(self) -> str:
-        return f"<OrionSNMPv3Credential: {self.name or self.id}>"
 
 
 class OrionSNMPv2Credential(OrionCredential):
+    credential_type = CREDENTIAL_TYPE_SNMPV2
+    _swquery_filter = "CredentialType = @credential_type"
+    _swquery_params = MappingProxyType({"credential_type": credential_type})
+    _create_verb = "CreateSNMPCredentials"
+    _update_verb = "UpdateSNMPCredentials"
+
     def __init__(
         self,
         api: API,
@@ -137,53 +301,34 @@ class OrionSNMPv2Credential(OrionCredential):
         name: str = "",
         community: str = "",
         owner: str = "Orion",
+        description: str = "",
+        uri: Optional[str] = None,
     ) -> None:
         self.api = api
+        self.uri = uri
         self.id = id
         self.name = name
         self.community = community
         self.owner = owner
+        self.description = description
         super().__init__()
 
     def _validate(self) -> None:
-        if not self.name:
-            raise ValueError("Must provide credential name.")
+        super()._validate()
         if not self.community:
             raise ValueError("Must provide community string.")
 
-    def create(self) -> bool:
-        if self.exists():
-            raise SWObjectExists()
-        self._validate()
-
-        self.id = self.api.invoke(
-            self.endpoint,
-            "CreateSNMPCredentials",
-            self.name,
-            self.community,
-            self.owner,
-        )
-        return True
-
-    def save(self) -> bool:
-        if not self.exists():
-            return self.create()
-        else:
-            self._validate()
-            self.api.invoke(
-                self.endpoint,
-                "UpdateSNMPCredentials",
-                self.id,
-                self.name,
-                self.community,
-            )
-            return True
-
-    def __repr__(self) -> str:
-        return f"<OrionSNMPv2Credential: {self.name or self.id}>"
+    def _verb_args(self) -> Tuple:
+        return (self.name, self.community)
 
 
 class OrionUserPassCredential(OrionCredential):
+    credential_type = CREDENTIAL_TYPE_USERPASS
+    _swquery_filter = "CredentialType = @credential_type"
+    _swquery_params = MappingProxyType({"credential_type": credential_type})
+    _create_verb = "CreateUsernamePasswordCredentials"
+    _update_verb = "UpdateUsernamePasswordCredentials"
+
     def __init__(
         self,
         api: API,
@@ -192,51 +337,25 @@ class OrionUserPassCredential(OrionCredential):
         owner: str = "Orion",
         username: str = "",
         password: str = "",
+        description: str = "",
+        uri: Optional[str] = None,
     ) -> None:
         self.api = api
+        self.uri = uri
         self.id = id
         self.name = name
         self.owner = owner
         self.username = username
         self.password = password
+        self.description = description
         super().__init__()
 
     def _validate(self) -> None:
-        if not self.name:
-            raise ValueError("Must provide credential name.")
+        super()._validate()
         if not self.username:
             raise ValueError("Must provide username.")
         if not self.password:
             raise ValueError("Must provide password.")
 
-    def create(self) -> bool:
-        if self.exists():
-            raise SWObjectExists
-        else:
-            self._validate()
-            self.id = self.api.invoke(
-                self.endpoint,
-                "CreateUsernamePasswordCredentials",
-                self.name,
-                self.username,
-                self.password,
-                self.owner,
-            )
-            return True
-
-    def save(self) -> bool:
-        if not self.exists():
-            return self.create()
-        else:
-            self._validate()
-            self.api.invoke(
-                self.endpoint,
-                "UpdateUsernamePasswordCredentials",
-                self.id,
-                self.name,
-                self.username,
-                self.password,
-            )
-
-    def __repr__(self) -> str:
-        return f"<OrionUserPassCredential: {self.name or self.id}>"
+    def _verb_args(self) -> Tuple:
+        return (self.name, self.username, self.password)
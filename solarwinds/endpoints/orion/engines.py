@@ -17,6 +17,7 @@ class OrionEngine(Endpoint):
         "ip_address": "IP",
     }
     _swquery_attrs = ["id", "name", "ip_address"]
+    _swunique_attrs = ["id"]
     _swargs_attrs = ["id", "name", "ip_address"]
 
     def __init__(
@@ -12,6 +12,27 @@ from solarwinds.logging import get_logger
 
 logger = get_logger(__name__)
 
+INTERFACES_BY_NODE_QUERY = """
+    SELECT
+        I.Uri AS uri,
+        I.AdminStatus AS admin_status,
+        I.InterfaceID AS id,
+        I.InterfaceName AS name,
+        I.MTU AS mtu,
+        I.OperStatus AS oper_status,
+        I.PhysicalAddress AS mac_address,
+        I.Speed AS speed
+    FROM
+        Orion.Nodes N
+    JOIN
+        Orion.NPM.Interfaces I ON N.NodeID = I.NodeID
+    WHERE
+        N.NodeID = @node_id
+"""
+
+# abbreviated interface name, e.g. gi0/1 -> ("gi", "0/1")
+IFACE_ABBR_RE = re.compile(r"^([a-z\-]+)([\d\/\:]+)$")
+
 
 class OrionInterface(Endpoint):
     endpoint = "Orion.NPM.Interfaces"
@@ -93,15 +114,14 @@ class OrionInterfaces(object):
 
     def _get_iface_by_abbr(self, abbr):
         abbr = abbr.lower()
-        abbr_pattern = r"^([a-z\-]+)([\d\/\:]+)$"
-        match = re.match(abbr_pattern, abbr)
+        match = IFACE_ABBR_RE.match(abbr)
         if match:
             begin = match.group(1)
             end = match.group(2)
             full_pattern = re.compile(f"^{begin}[a-z\-]+{end}$", re.I)
             matches = []
             for iface in self._existing:
-                if re.match(full_pattern, iface.name):
+                if full_pattern.match(iface.name):
                     matches.append(iface)
             if len(matches) == 0:
                 raise IndexError(f"no matches found: {abbr}")
@@ -128,24 +148,7 @@ class OrionInterfaces(object):
         to node
         """
         logger.info(f"{self.node.name}: getting existing interfaces...")
-        query = f"""
-            SELECT
-                I.Uri AS uri,
-                I.AdminStatus AS admin_status,
-                I.InterfaceID AS id,
-                I.InterfaceName AS name,
-                I.MTU AS mtu,
-                I.OperStatus AS oper_status,
-                I.PhysicalAddress AS mac_address,
-                I.Speed AS speed
-            FROM
-                Orion.Nodes N
-            JOIN
-                Orion.NPM.Interfaces I ON N.NodeID = I.NodeID
-            WHERE
-                N.NodeID = '{self.node.id}'
-        """
-        result = self.api.query(query)
+        result = self.api.query(INTERFACES_BY_NODE_QUERY, node_id=self.node.id)
         if result:
             self._existing = [OrionInterface(self.node, data=data) for data in result]
         logger.info(
@@ -183,12 +186,12 @@ class OrionInterfaces(object):
         # will hang at "unknown" status
         if not isinstance(self.node.polling_engine, OrionEngine):
             self._resolve_endpoint_attrs()
-        api_hostname = self.api.hostname
-        self.api.hostname = self.node.polling_engine.ip_address
         result = self.api.invoke(
-            "Orion.NPM.Interfaces", "DiscoverInterfacesOnNode", self.node.id
+            "Orion.NPM.Interfaces",
+            "DiscoverInterfacesOnNode",
+            self.node.id,
+            hostname=self.node.polling_engine.ip_address,
         )
-        self.api.hostname = api_hostname
         self._discovery_response_code = result["Result"]
         if self._discovery_response_code == 0:
             results = result["DiscoveredInterfaces"]
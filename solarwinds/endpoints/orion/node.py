@@ -5,7 +5,11 @@ from typing import Dict, List, Optional, Union
 import solarwinds.defaults as d
 from solarwinds.api import API
 from solarwinds.endpoint import Endpoint
-from solarwinds.endpoints.orion.credential import OrionCredential, OrionSNMPv2Credential
+from solarwinds.endpoints.orion.credential import (
+    OrionCredential,
+    OrionSNMPv2Credential,
+    query_credential_id,
+)
 from solarwinds.endpoints.orion.engines import OrionEngine
 from solarwinds.endpoints.orion.interface import OrionInterfaces
 from solarwinds.endpoints.orion.pollers import OrionPoller, OrionPollers
@@ -23,6 +27,18 @@ logger = get_logger(__name__)
 
 DEFAULT_POLLING_ENGINE_ID = 1
 
+DISCOVERY_STATUS_QUERY = (
+    "SELECT Status FROM Orion.DiscoveryProfiles WHERE ProfileID = @profile_id"
+)
+DISCOVERY_LOG_QUERY = (
+    "SELECT Result, ResultDescription, ErrorMessage, BatchID "
+    "FROM Orion.DiscoveryLogs WHERE ProfileID = @profile_id"
+)
+DISCOVERY_LOG_ITEMS_QUERY = (
+    "SELECT EntityType, DisplayName, NetObjectID "
+    "FROM Orion.DiscoveryLogItems WHERE BatchID = @batch_id"
+)
+
 
 class OrionNode(Endpoint):
     endpoint = "Orion.Nodes"
@@ -79,8 +95,10 @@ class OrionNode(Endpoint):
         snmpv2_rw_community: Optional[str] = None,
         snmpv3_ro_cred: Optional[OrionCredential] = None,
         snmpv3_rw_cred: Optional[OrionCredential] = None,
+        uri: Optional[str] = None,
     ):
         self.api = api
+        self.uri = uri
         self.caption = caption
         self.custom_properties = custom_properties
         self.ip_address = ip_address
@@ -92,8 +110,10 @@ class OrionNode(Endpoint):
         self.snmp_version = snmp_version
         self.snmpv2_ro_community = snmpv2_ro_community
         self.snmpv2_rw_community = snmpv2_rw_community
-        self.snmpv3_ro_cred = snmpv3_ro_cred
-        self.snmpv3_rw_cred = snmpv3_rw_cred
+        # set directly: the properties would try to fetch settings, which
+        # don't exist until the node does
+        self._snmpv3_ro_cred = snmpv3_ro_cred
+        self._snmpv3_rw_cred = snmpv3_rw_cred
 
         self.map_point = None
 
@@ -112,12 +132,10 @@ class OrionNode(Endpoint):
 
         super().__init__()
 
-        pollers = pollers or d.NODE_DEFAULT_POLLERS
+        # only pollers passed explicitly are added to an existing node; the
+        # defaults for the polling method are applied by enable_pollers()
         self.pollers = OrionPollers(node=self, pollers=pollers)
 
-        if self.exists():
-            self.settings.fetch()
-
     @property
     def name(self) -> Optional[str]:
         return self.caption
@@ -154,6 +172,28 @@ class OrionNode(Endpoint):
     def hostname(self, hostname: str) -> None:
         self.caption = hostname
 
+    # SNMPv3 credentials are stored as node settings, which are only fetched
+    # once one of these is used rather than for every node constructed
+    @property
+    def snmpv3_ro_cred(self) -> Optional[OrionCredential]:
+        self.settings.ensure_fetched()
+        return self._snmpv3_ro_cred
+
+    @snmpv3_ro_cred.setter
+    def snmpv3_ro_cred(self, cred: Optional[OrionCredential]) -> None:
+        self.settings.ensure_fetched()
+        self._snmpv3_ro_cred = cred
+
+    @property
+    def snmpv3_rw_cred(self) -> Optional[OrionCredential]:
+        self.settings.ensure_fetched()
+        return self._snmpv3_rw_cred
+
+    @snmpv3_rw_cred.setter
+    def snmpv3_rw_cred(self, cred: Optional[OrionCredential]) -> None:
+        self.settings.ensure_fetched()
+        self._snmpv3_rw_cred = cred
+
     @property
     def status(self) -> Optional[str]:
         return self._swp.get("Status")
@@ -169,8 +209,6 @@ class OrionNode(Endpoint):
             else:
                 self.polling_method = "icmp"
                 self.snmp_version = 0
-        if not self.pollers:
-            self.pollers = d.NODE_DEFAULT_POLLERS[self.polling_method.lower()]
 
     def _get_attr_updates(self) -> Dict:
         """
@@ -182,14 +220,15 @@ class OrionNode(Endpoint):
             "ip_address": swdata["IPAddress"],
             "snmpv2_ro_community": swdata["Community"],
             "snmpv2_rw_community": swdata["RWCommunity"],
-            "polling_engine": OrionEngine(api=self.api, id=swdata["EngineID"]),
+            # only looked up if the node wasn't given its engine
+            "polling_engine": self.polling_engine
+            or OrionEngine(api=self.api, id=swdata["EngineID"]),
             "polling_method": self._get_polling_method(),
             "snmp_version": swdata["SNMPVersion"],
         }
 
-    def _build_swargs(self) -> None:
-        swargs = {"properties": None, "custom_properties": None}
-        properties = {
+    def _get_swargs_properties(self) -> Dict:
+        return {
             "Caption": self.caption,
             "IPAddress": self.ip_address,
             "Community": self.snmpv2_ro_community,
@@ -198,33 +237,17 @@ class OrionNode(Endpoint):
             "SNMPVersion": self._get_snmp_version(),
             "EngineID": self.polling_engine.id,
         }
-        custom_properties = {}
-
-        extra_swargs = self._get_extra_swargs()
-        if extra_swargs:
-            for k, v in extra_swargs.items():
-                properties[k] = v
-                logger.debug(f'_swargs["properties"]["{k}"] = {v}')
-
-        if hasattr(self, "custom_properties"):
-            custom_properties = self.custom_properties
-            logger.debug(f'_swargs["custom_properties"] = {self.custom_properties}')
-
-        swargs["properties"] = properties
-        swargs["custom_properties"] = custom_properties
-        if swargs.get("properties") or swargs.get("custom_properties"):
-            self._swargs = swargs
 
     def _get_discovery_status(self) -> None:
         if not self._discovery_profile_id:
             return None
-        query = (
-            "SELECT Status FROM Orion.DiscoveryProfiles "
-            f"WHERE ProfileID = {self._discovery_profile_id}"
+        result = self.api.query_one(
+            DISCOVERY_STATUS_QUERY, profile_id=self._discovery_profile_id
         )
-        self._discovery_profile_status = self.api.query(query)[0]["Status"]
+        if result:
+            self._discovery_profile_status = result["Status"]
 
-    def _get_import_status(self) -> None:
+    def _get_import_status(self, hostname: Optional[str] = None) -> None:
         if not self._import_job_id:
             return None
         self._import_status = self.api.invoke(
@@ -232,6 +255,7 @@ class OrionNode(Endpoint):
             "GetScheduledListResourcesStatus",
             self._import_job_id,
             self.id,
+            hostname=hostname,
         )
 
     def _get_extra_swargs(self) -> Dict:
@@ -268,20 +292,26 @@ class OrionNode(Endpoint):
 
     def enable_pollers(self) -> bool:
         id = self.id or self._get_id()
-        if not self.pollers:
+        requested = self.pollers.requested
+        if not requested and self.polling_method:
+            requested = d.NODE_DEFAULT_POLLERS.get(self.polling_method.lower(), ())
+        existing = set(self.pollers.list)
+        requested = [x for x in requested if x not in existing]
+        if not requested:
             logger.warning(f"no pollers to enable, doing nothing")
             return False
         else:
-            for poller_type in self.pollers:
-                poller = {
-                    "PollerType": poller_type,
-                    "NetObject": f"N:{id}",
-                    "NetObjectType": "N",
-                    "NetObjectID": id,
-                    "Enabled": True,
-                }
-                self.api.create("Orion.Pollers", **poller)
+            # everything but the poller type is the same for each poller
+            poller = {
+                "NetObject": f"N:{id}",
+                "NetObjectType": "N",
+                "NetObjectID": id,
+                "Enabled": True,
+            }
+            for poller_type in requested:
+                self.api.create("Orion.Pollers", PollerType=poller_type, **poller)
                 logger.info(f"enabled poller {poller_type}")
+            self.pollers.fetch()
             return True
 
     def create(self) -> bool:
@@ -307,6 +337,7 @@ class OrionNode(Endpoint):
             self.snmp_version = 2
         created = super().create()
         if created:
+            self.settings.mark_new()
             self.enable_pollers()
             if snmp_version == 3:
                 self.snmp_version = 3
@@ -341,20 +372,15 @@ class OrionNode(Endpoint):
         credentials = []
         order = 1
         if self.snmp_version == 2:
-            if self.snmpv2_rw_community:
-                cred = OrionSNMPv2Credential(
-                    api=self.api, name=self.snmpv2_rw_community
-                )
-                if cred.exists():
-                    credentials.append({"CredentialID": cred.id, "Order": order})
-                    order += 1
-            if self.snmpv2_ro_community:
-                cred = OrionSNMPv2Credential(
-                    api=self.api, name=self.snmpv2_ro_community
-                )
-                if cred.exists():
-                    credentials.append({"CredentialID": cred.id, "Order": order})
-                    order += 1
+            # only the credential IDs are needed, so skip building the objects
+            for community in (self.snmpv2_rw_community, self.snmpv2_ro_community):
+                if community:
+                    cred_id = query_credential_id(
+                        self.api, community, OrionSNMPv2Credential.credential_type
+                    )
+                    if cred_id is not None:
+                        credentials.append({"CredentialID": cred_id, "Order": order})
+                        order += 1
         if self.snmp_version == 3:
             if self.snmpv3_rw_cred:
                 credentials.append(
@@ -421,12 +447,10 @@ class OrionNode(Endpoint):
             )
 
         if self._discovery_profile_status == 2:
-            query = (
-                "SELECT Result, ResultDescription, ErrorMessage, BatchID "
-                f"FROM Orion.DiscoveryLogs WHERE ProfileID = {self._discovery_profile_id}"
+            result = self.api.query_one(
+                DISCOVERY_LOG_QUERY, profile_id=self._discovery_profile_id
             )
-            result = self.api.query(query)
-            result_code = result[0]["Result"]
+            result_code = (result or {}).get("Result")
         else:
             raise SWDiscoveryError(
                 f"{self.name}: node discovery failed. last status: {NODE_DISCOVERY_STATUS_MAP[self._discovery_profile_status]}"
@@ -436,12 +460,10 @@ class OrionNode(Endpoint):
             logger.info(
                 f"{self.name}: node discovery job finished, getting discovered items..."
             )
-            batch_id = result[0]["BatchID"]
-            query = (
-                "SELECT EntityType, DisplayName, NetObjectID FROM "
-                f"Orion.DiscoveryLogItems WHERE BatchID = '{batch_id}'"
+            batch_id = result["BatchID"]
+            self._discovered_entities = self.api.query(
+                DISCOVERY_LOG_ITEMS_QUERY, batch_id=batch_id
             )
-            self._discovered_entities = self.api.query(query)
             if self._discovered_entities:
                 self._get_swdata()
                 self.caption = self._swp.get("Caption")
@@ -451,8 +473,8 @@ class OrionNode(Endpoint):
                     f"{self.name}: discovery found nothing at IP: {self.ip_address}"
                 )
         else:
-            error_status = NODE_DISCOVERY_STATUS_MAP[result_code]
-            error_message = result["ErrorMessage"]
+            error_status = NODE_DISCOVERY_STATUS_MAP.get(result_code, result_code)
+            error_message = result.get("ErrorMessage")
             raise SWDiscoveryError(
                 f"{self.name}: node discovery failed. Status: {error_status}, Error: {error_message}"
             )
@@ -486,47 +508,48 @@ class OrionNode(Endpoint):
         # the verbs associated with this method need to be pointed at this
         # node's assigned polling engine. If they are directed at the main SWIS
         # server and the node uses a different polling engine, the process
-        # will hang at "unknown" status
+        # will hang at "unknown" status. The engine is passed per call rather
+        # than switching the shared API's hostname, which other threads use.
         if not isinstance(self.polling_engine, OrionEngine):
             self._resolve_endpoint_attrs()
-        api_hostname = self.api.hostname
-        self.api.hostname = self.polling_engine.ip_address
+        engine = self.polling_engine.ip_address
 
         self._import_job_id = self.api.invoke(
-            "Orion.Nodes", "ScheduleListResources", self.id
+            "Orion.Nodes", "ScheduleListResources", self.id, hostname=engine
         )
         logger.debug(f"{self.name}: resource import job ID: {self._import_job_id}")
-        self._get_import_status()
+        self._get_import_status(hostname=engine)
         seconds_waited = 0
         report_increment = 5
         while seconds_waited < timeout and self._import_status != "ReadyForImport":
             sleep(report_increment)
             seconds_waited += report_increment
-            self._get_import_status()
+            self._get_import_status(hostname=engine)
             logger.debug(
                 f"{self.name}: resource import: waited {seconds_waited}sec, "
                 f"timeout {timeout}sec, status: {self._import_status}"
             )
         if self._import_status == "ReadyForImport":
             imported = self.api.invoke(
-                "Orion.Nodes", "ImportListResourcesResult", self._import_job_id, self.id
+                "Orion.Nodes",
+                "ImportListResourcesResult",
+                self._import_job_id,
+                self.id,
+                hostname=engine,
             )
             if imported:
                 logger.info(
                     f"{self.name}: imported and monitored all SNMP resources (OIDs)"
                 )
-                self.api.hostname = api_hostname
                 # discovery causes new pollers to be added automatically; let's fetch them
                 self.pollers.fetch()
                 return True
             else:
-                self.api.hostname = api_hostname
                 raise SWResourceImportError(
                     f"{self.name}: SNMP resource import failed. "
                     "SWIS does not provide any further info."
                 )
         else:
-            self.api.hostname = api_hostname
             raise SWResourceImportError(
                 f"{self.name}: timed out waiting for SNMP resources ({timeout}sec)"
             )
@@ -588,7 +611,3 @@ class OrionNode(Endpoint):
 
     def __str__(self) -> str:
         return self.name or self.ip_address  # type: ignore
-
-
-class OrionNodes(object):
-    pass
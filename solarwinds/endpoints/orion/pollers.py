@@ -3,6 +3,12 @@ from typing import Dict, List, Optional, Union
 from solarwinds.api import API
 from solarwinds.exceptions import SWObjectExists
 
+POLLERS_BY_NODE_QUERY = (
+    "SELECT PollerID, PollerType, NetObject, NetObjectType, NetObjectID, "
+    "Enabled, DisplayName, Description, InstanceType, Uri, InstanceSiteId "
+    "FROM Orion.Pollers WHERE NetObjectID = @node_id"
+)
+
 
 class OrionPoller:
     _endpoint = "Orion.Pollers"
@@ -73,7 +79,7 @@ class OrionPoller:
     def save(self) -> bool:
         updates = {}
         for attr, prop in self._write_attr_map.items():
-            updates.update({prop: getattr(self, attr)})
+            updates[prop] = getattr(self, attr)
         self.api.update(self.uri, **updates)
         return True
 
@@ -118,12 +124,16 @@ class OrionPollers:
         self.node = node
         self.api = self.node.api
         self._pollers = []
+        # poller types passed by the caller: added here to an existing node,
+        # and created along with a new one by node.create()
+        self.requested = tuple(pollers) if pollers else ()
         if self.node.exists():
             self.fetch()
-        if pollers:
-            for poller in pollers:
-                if not self.get(poller):
+            existing = set(self.list)
+            for poller in self.requested:
+                if poller not in existing:
                     self.add(type=poller, enabled=True)
+                    existing.add(poller)
 
     @property
     def list(self) -> List:
@@ -135,7 +145,7 @@ class OrionPollers:
 
         poller = {
             "PollerType": type,
-            "NetObject": f"N:{id}",
+            "NetObject": f"N:{self.node.id}",
             "NetObjectType": "N",
             "NetObjectID": self.node.id,
             "Enabled": enabled,
@@ -162,12 +172,7 @@ class OrionPollers:
         return poller.enable()
 
     def fetch(self) -> None:
-        query = (
-            f"SELECT PollerID, PollerType, NetObject, NetObjectType, NetObjectID, "
-            "Enabled, DisplayName, Description, InstanceType, Uri, InstanceSiteId "
-            f"FROM Orion.Pollers WHERE NetObjectID='{self.node.id}'"
-        )
-        results = self.api.query(query)
+        results = self.api.query(POLLERS_BY_NODE_QUERY, node_id=self.node.id)
         if results:
             pollers = []
             for result in results:
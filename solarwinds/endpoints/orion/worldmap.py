@@ -7,8 +7,18 @@ class WorldMapPoint(Endpoint):
     _type = "map_point"
     _id_attr = "point_id"
     _swid_key = "PointId"
+    _attr_map = {
+        "point_id": "PointId",
+        "instance_id": "InstanceID",
+        "instance": "Instance",
+        "latitude": "Latitude",
+        "longitude": "Longitude",
+        "auto_added": "AutoAdded",
+        "street_address": "StreetAddress",
+    }
     _required_swargs_attrs = ["instance_id"]
     _swquery_attrs = ["point_id", "instance_id"]
+    _swunique_attrs = ["point_id"]
     _swargs_attrs = [
         "instance_id",
         "instance",
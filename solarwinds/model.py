@@ -1,3 +1,5 @@
 class BaseModel(object):
+    __slots__ = ("api",)
+
     def __init__(self, api):
         self.api = api
@@ -1,17 +1,32 @@
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union
 
+import solarwinds.defaults as d
 from solarwinds.endpoints.orion.credential import OrionCredential
 from solarwinds.endpoints.orion.engines import OrionEngine
-from solarwinds.endpoints.orion.node import OrionNode
-from solarwinds.models.orion.credential import Credential
-from solarwinds.models.orion.worldmap import WorldMap
+from solarwinds.models.orion.credential import Credential, credential_model
+from solarwinds.models.orion.node_settings import OrionNodeSettings
+
+if TYPE_CHECKING:
+    from solarwinds.endpoints.orion.node import OrionNode
+    from solarwinds.models.orion.worldmap import WorldMap
 
 
 class Orion:
     def __init__(self, api):
         self.api = api
-        self.worldmap = WorldMap(api=api)
-        self.credential = Credential(api=api)
+
+    @cached_property
+    def worldmap(self) -> "WorldMap":
+        from solarwinds.models.orion.worldmap import WorldMap
+
+        return WorldMap(api=self.api)
+
+    @cached_property
+    def credential(self) -> Credential:
+        return credential_model(self.api)
 
     def engine(
         self,
@@ -37,7 +52,11 @@ class Orion:
         snmpv2_rw_community: Optional[str] = None,
         snmpv3_ro_cred: Optional[OrionCredential] = None,
         snmpv3_rw_cred: Optional[OrionCredential] = None,
-    ) -> OrionNode:
+        uri: Optional[str] = None,
+    ) -> "OrionNode":
+        # imported here: OrionNode's settings module lives in this package
+        from solarwinds.endpoints.orion.node import OrionNode
+
         return OrionNode(
             api=self.api,
             ip_address=ip_address,
@@ -54,4 +73,80 @@ class Orion:
             snmpv2_rw_community=snmpv2_rw_community,
             snmpv3_ro_cred=snmpv3_ro_cred,
             snmpv3_rw_cred=snmpv3_rw_cred,
+            uri=uri,
+        )
+
+    def nodes(
+        self, page_size: Optional[int] = None, max_workers: Optional[int] = None
+    ) -> Iterator["OrionNode"]:
+        """
+        Yield every node in Orion. Nodes are queried a page at a time and
+        each one is only built when the caller gets to it. Building a node
+        takes a few SWIS round-trips; with `max_workers`, that many nodes are
+        built at once over the shared connection pool, still yielded in order.
+        """
+        # selecting Uri up front lets each node skip its own uri lookup query
+        query = (
+            "SELECT NodeID, Caption, IPAddress, EngineID, Uri "
+            "FROM Orion.Nodes ORDER BY NodeID"
         )
+        rows = self.api.iter_query(query, page_size=page_size)
+        # most nodes share a few polling engines, so each is built once and
+        # handed to its nodes rather than looked up again for every node
+        engines: Dict[int, OrionEngine] = {}
+
+        def resolve_engines(batch: List[Dict]) -> None:
+            for engine_id in dict.fromkeys(row["EngineID"] for row in batch):
+                if engine_id not in engines:
+                    engines[engine_id] = self.engine(id=engine_id)
+
+        def build(row: Dict) -> "OrionNode":
+            return self.node(
+                ip_address=row["IPAddress"],
+                caption=row["Caption"],
+                id=row["NodeID"],
+                polling_engine=engines[row["EngineID"]],
+                uri=row["Uri"],
+            )
+
+        if not max_workers or max_workers < 2:
+            for row in rows:
+                resolve_engines([row])
+                yield build(row)
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                batch = list(islice(rows, max_workers))
+                if not batch:
+                    return
+                resolve_engines(batch)
+                yield from executor.map(build, batch)
+
+    def fetch_settings_bulk(self, nodes: Iterable["OrionNode"]) -> None:
+        """
+        Load settings for many existing nodes with one query instead of one
+        query per node
+        """
+        OrionNodeSettings.fetch_many(self.api, nodes)
+
+    def create_nodes(
+        self, nodes: List[Dict], max_workers: Optional[int] = None
+    ) -> List[Union["OrionNode", Exception]]:
+        """
+        Create many nodes concurrently. Each item in `nodes` is a dict of
+        keyword arguments for `node()`. Creating a node takes several SWIS
+        round-trips, so up to `max_workers` nodes are created at once over
+        the shared connection pool. Results are returned in the order given:
+        the created node, or the exception raised trying to create it, so
+        one failure doesn't hide the nodes that were created.
+        """
+
+        def create(node_args: Dict) -> "OrionNode":
+            node = self.node(**node_args)
+            node.create()
+            return node
+
+        max_workers = max_workers or d.NODE_CREATE_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(create, node_args) for node_args in nodes]
+        return [future.exception() or future.result() for future in futures]
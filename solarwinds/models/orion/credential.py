@@ -1,40 +1,243 @@
-from typing import Literal, Optional
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
 
+import solarwinds.defaults as d
 from solarwinds.endpoints.orion.credential import (
+    CREDENTIAL_QUERY,
+    CREDENTIAL_TYPE_SNMPV2,
+    CREDENTIAL_TYPE_SNMPV3,
+    CREDENTIAL_TYPE_USERPASS,
+    OrionCredential,
     OrionSNMPv2Credential,
     OrionSNMPv3Credential,
     OrionUserPassCredential,
+    clear_credential_cache,
+    credential_generation,
+    query_credential,
+    query_credential_id,
 )
+from solarwinds.exceptions import SWObjectPropertyError
 from solarwinds.model import BaseModel
 
+# last segment of Orion.Credential.CredentialType -> endpoint class
+CREDENTIAL_CLASSES = {
+    CREDENTIAL_TYPE_SNMPV2.rpartition(".")[2]: OrionSNMPv2Credential,
+    CREDENTIAL_TYPE_SNMPV3.rpartition(".")[2]: OrionSNMPv3Credential,
+    CREDENTIAL_TYPE_USERPASS.rpartition(".")[2]: OrionUserPassCredential,
+}
+# kinds create_many() accepts, each the name of a factory method on Credential
+CREDENTIAL_KINDS = ("snmpv2", "snmpv3", "userpass")
+
 
 class Credential(BaseModel):
+    __slots__ = ("_cache", "_lock")
     name = "Credential"
 
-    def get(self, id: Optional[int] = None, name: Optional[str] = None):
-        if id:
-            query = f"SELECT ID, Name, Description, CredentialType, CredentialOwner FROM Orion.Credential WHERE ID = '{id}'"
-        if name:
-            query = f"SELECT ID, Name, Description, CredentialType, CredentialOwner FROM Orion.Credential WHERE Name = '{name}'"
-        result = self.api.query(query)[0]
-
-        if result:
-            if result["CredentialType"].endswith("SnmpCredentialsV3"):
-                return OrionSNMPv3Credential(
-                    api=self.api,
-                    id=id,
-                    name=name,
-                    owner=result["CredentialOwner"],
-                    description=result["Description"],
-                )
-            if result["CredentialType"].endswith("SnmpCredentialsV2"):
-                return OrionSNMPv2Credential(
-                    api=self.api,
-                    id=id,
-                    name=name,
-                    owner=result["CredentialOwner"],
-                    description=result["Description"],
-                )
+    def __init__(self, api):
+        super().__init__(api)
+        # credentials already returned, keyed by ("id", id) and ("name", name),
+        # as (credential generation, expiry time, credential), least recently
+        # used first. Entries expire with the credential lookup cache, and
+        # are dropped whenever a credential is created, changed or deleted.
+        self._cache: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, id: Optional[int] = None, name: Optional[str] = None, cache: bool = True
+    ):
+        if cache:
+            credential = self._cached(id=id, name=name)
+            if credential is not None:
+                return credential
+        if id is not None:
+            key, value = "id", id
+        elif name:
+            key, value = "name", name
+        else:
+            raise ValueError("must provide either credential ID or name")
+        generation = credential_generation()
+        # the row carries CredentialType, so one query both finds and types it
+        result = query_credential(self.api, key, value, cache=cache)
+        if not result:
+            return None
+        credential = self._from_row(result)
+        self._remember(credential, generation)
+        return credential
+
+    async def aget(
+        self, id: Optional[int] = None, name: Optional[str] = None, cache: bool = True
+    ):
+        """
+        Awaitable get(), run in the event loop's default executor so many
+        lookups can be in flight at once over the shared connection pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.get, id=id, name=name, cache=cache)
+        )
+
+    def get_id(self, name: str, credential_type: Optional[str] = None) -> Optional[int]:
+        """
+        Get only the ID of the credential `name`, without building it.
+        Pass `credential_type` to only match one type of credential.
+        """
+        credential = self._cached(name=name)
+        if credential is not None and (
+            credential_type is None or credential.credential_type == credential_type
+        ):
+            return credential.id
+        return query_credential_id(self.api, name, credential_type)
+
+    def get_many(
+        self,
+        names: Optional[Iterable[str]] = None,
+        ids: Optional[Iterable[int]] = None,
+    ) -> Dict[Union[str, int], OrionCredential]:
+        """
+        Get several credentials by name or by ID in one query. Returns a
+        dict keyed the same way; credentials that don't exist are left out.
+        """
+        credentials = {}
+        generation = credential_generation()
+        if ids is not None:
+            missing = []
+            for id in dict.fromkeys(ids):
+                credential = self._cached(id=id)
+                if credential is not None:
+                    credentials[id] = credential
+                else:
+                    missing.append(id)
+            for credential in self._query_many("ID", missing):
+                self._remember(credential, generation)
+                credentials[credential.id] = credential
+            return credentials
+        missing = []
+        for name in dict.fromkeys(names or ()):
+            credential = self._cached(name=name)
+            if credential is not None:
+                credentials[name] = credential
+            else:
+                missing.append(name)
+        for credential in self._query_many("Name", missing):
+            self._remember(credential, generation)
+            credentials[credential.name] = credential
+        return credentials
+
+    def _query_many(self, column: str, values: Iterable) -> List[OrionCredential]:
+        params = {f"v{i}": value for i, value in enumerate(values)}
+        if not params:
+            return []
+        placeholders = ", ".join(f"@{param}" for param in params)
+        query = f"{CREDENTIAL_QUERY} WHERE {column} IN ({placeholders})"
+        return [self._from_row(row) for row in self.api.query(query, **params) or []]
+
+    def _from_row(self, row: Dict) -> OrionCredential:
+        cred_type = row["CredentialType"]
+        cred_class = CREDENTIAL_CLASSES.get(cred_type.rpartition(".")[2])
+        if cred_class is None:
+            raise SWObjectPropertyError(f"unsupported credential type: {cred_type}")
+        return cred_class(
+            api=self.api,
+            id=row["ID"],
+            name=row["Name"],
+            owner=row["CredentialOwner"],
+            description=row["Description"],
+            uri=row["Uri"],
+        )
+
+    def _cached(
+        self, id: Optional[int] = None, name: Optional[str] = None
+    ) -> Optional[OrionCredential]:
+        if id is not None:
+            key = ("id", id)
+        elif name:
+            key = ("name", name)
+        else:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            generation, expires, credential = entry
+            if generation != credential_generation():
+                # a credential was created, changed or deleted since
+                self._cache.clear()
+                return None
+            if expires <= monotonic():
+                return None
+            self._cache.move_to_end(key)
+        # a cached credential renamed since won't match anymore
+        if id is not None or credential.name == name:
+            return credential
+        return None
+
+    def _remember(self, credential: OrionCredential, generation: int) -> None:
+        """Cache a credential looked up while `generation` was current"""
+        if generation != credential_generation():
+            return
+        entry = (generation, monotonic() + d.CREDENTIAL_CACHE_TTL, credential)
+        with self._lock:
+            for key in (("id", credential.id), ("name", credential.name)):
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+            while len(self._cache) > d.CREDENTIAL_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, id: Optional[int] = None, name: Optional[str] = None) -> None:
+        """
+        Forget the cached credential with `id` or `name`, or every cached
+        credential if neither is given
+        """
+        if id is None and not name:
+            with self._lock:
+                self._cache.clear()
+            return
+        credential = self._cached(id=id, name=name)
+        keys = [("id", id), ("name", name)]
+        if credential is not None:
+            keys += [("id", credential.id), ("name", credential.name)]
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def cache_clear(self) -> None:
+        """Drop all cached credentials and credential lookups"""
+        with self._lock:
+            self._cache.clear()
+        clear_credential_cache()
+
+    def create_many(
+        self,
+        kind: Literal["snmpv2", "snmpv3", "userpass"],
+        credentials: List[Dict],
+        max_workers: Optional[int] = None,
+    ) -> List[Union[OrionCredential, Exception]]:
+        """
+        Create many credentials of one kind concurrently. Each item in
+        `credentials` is a dict of keyword arguments for snmpv2(), snmpv3()
+        or userpass(). SWIS has no bulk create verb for credentials, so up
+        to `max_workers` are created at once over the shared connection
+        pool. Results are returned in the order given: the created
+        credential, or the exception raised trying to create it.
+        """
+        if kind not in CREDENTIAL_KINDS:
+            raise ValueError(f"kind must be: {list(CREDENTIAL_KINDS)}")
+        build = getattr(self, kind)
+
+        def create(credential_args: Dict) -> OrionCredential:
+            credential = build(**credential_args)
+            credential.create()
+            return credential
+
+        max_workers = max_workers or d.CREDENTIAL_CREATE_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(create, args) for args in credentials]
+        return [future.exception() or future.result() for future in futures]
 
     def snmpv2(
         self,
@@ -94,3 +297,17 @@ class Credential(BaseModel):
             password=password,
             owner=owner,
         )
+
+
+# one model per connection, so nodes share its cached credentials
+_models: Dict[str, Credential] = {}
+_models_lock = threading.Lock()
+
+
+def credential_model(api) -> Credential:
+    """The Credential model shared by everything using `api`"""
+    with _models_lock:
+        model = _models.get(api.connection)
+        if model is None or model.api is not api:
+            model = _models[api.connection] = Credential(api)
+        return model
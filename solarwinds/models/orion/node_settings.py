@@ -1,15 +1,52 @@
-from typing import Union
+import re
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
 
 from solarwinds.endpoint import Endpoint
 from solarwinds.endpoints.orion.credential import OrionCredential
 from solarwinds.exceptions import SWObjectCreationError, SWObjectNotFound
 from solarwinds.logging import get_logger
-from solarwinds.models.orion.credential import (
-    Credential as CredentialModel,  # TODO: need undo this
-)
+from solarwinds.models.orion.credential import credential_model
 
 logger = get_logger(__name__)
 
+# Create returns the new row's uri, either nested under its node
+# (.../Orion.Nodes/NodeID=1/NodeSettings/NodeSettingID=5) or top-level
+# (.../Orion.NodeSettings/NodeSettingID=5); both end in the id
+NODE_SETTING_ID_RE = re.compile(r"NodeSettingID=(\d+)$")
+NODE_SETTINGS_QUERY = (
+    "SELECT NodeID, SettingName, SettingValue, NodeSettingID FROM Orion.NodeSettings"
+)
+NODE_SETTINGS_BY_NODE_QUERY = f"{NODE_SETTINGS_QUERY} WHERE NodeID = @node_id"
+NODE_SETTING_ID_QUERY = (
+    "SELECT TOP 1 NodeSettingID FROM Orion.NodeSettings "
+    "WHERE NodeID = @node_id AND SettingName = @name ORDER BY NodeSettingID DESC"
+)
+
+
+# ExecuteSQL takes raw TSQL without parameters, so ids are coerced to int
+# and text is quoted before it goes into a statement
+def _sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    text = str(value).replace("'", "''")
+    return f"'{text}'"
+
+
+def _insert_statement(node_id, name: str, value) -> str:
+    return (
+        "INSERT INTO NodeSettings (NodeID, SettingName, SettingValue) VALUES "
+        f"({int(node_id)}, {_sql_literal(name)}, {_sql_literal(value)})"
+    )
+
+
+def _delete_statement(setting: "OrionNodeSetting") -> str:
+    return (
+        "DELETE FROM NodeSettings "
+        f"WHERE NodeSettingID = {int(setting.node_setting_id)}"
+    )
+
 
 class OrionNodeSetting:
 
@@ -44,54 +81,117 @@ class OrionNodeSetting:
 
 class SNMPCredentialSetting(OrionNodeSetting):
     def build(self) -> None:
-        model = CredentialModel(api=self.api)
-        cred = model.get(id=self.value)
+        # most nodes reference the same few credentials, which the API's
+        # shared model looks up once
+        cred = credential_model(self.api).get(id=self.value)
         mode = self.name[:2]
         version = int(cred.type[-1:])
         self.node_attr = f"snmpv{version}_{mode.lower()}_cred"
         self.node_attr_value = cred
 
 
+class SettingSpec(NamedTuple):
+    setting_class: type
+    node_attr: str
+    setting_value_attr: str
+
+
 class OrionNodeSettings(object):
 
-    SETTING_MAP = {
-        "ROSNMPCredentialID": {
-            "class": SNMPCredentialSetting,
-            "node_attr": "snmpv3_ro_cred",
-            "setting_value_attr": "id",
-        },
-        "RWSNMPCredentialID": {
-            "class": SNMPCredentialSetting,
-            "node_attr": "snmpv3_rw_cred",
-            "setting_value_attr": "id",
-        },
-    }
+    # (setting name, spec) pairs; save() walks these in order
+    SETTING_SPECS = (
+        (
+            "ROSNMPCredentialID",
+            SettingSpec(SNMPCredentialSetting, "snmpv3_ro_cred", "id"),
+        ),
+        (
+            "RWSNMPCredentialID",
+            SettingSpec(SNMPCredentialSetting, "snmpv3_rw_cred", "id"),
+        ),
+    )
+    SETTING_MAP = MappingProxyType(dict(SETTING_SPECS))
 
     def __init__(self, node):
         self.node = node
         self.api = node.api
-        self._settings = []
+        # None until first use; see ensure_fetched()
+        self._settings: Optional[List[OrionNodeSetting]] = None
+        self._by_name: Dict[str, OrionNodeSetting] = {}
+        self._by_id: Dict[int, OrionNodeSetting] = {}
+
+    def ensure_fetched(self) -> None:
+        """
+        Fetch settings the first time they are needed. Nodes that don't
+        exist yet have none to fetch, so they stay unfetched until they do.
+        """
+        if self._settings is None and self.node.uri:
+            self.fetch()
+
+    def mark_new(self) -> None:
+        """The node was just created, so it has no settings yet to fetch"""
+        self._load([])
 
     def fetch(self) -> None:
+        rows = self.api.query(NODE_SETTINGS_BY_NODE_QUERY, node_id=self.node.id)
+        self._load(rows or [])
+
+    async def afetch(self) -> None:
+        """
+        Like fetch(), over the API's async client, so the settings of many
+        nodes can be fetched concurrently with asyncio.gather()
+        """
+        rows = await self.api.aquery(NODE_SETTINGS_BY_NODE_QUERY, node_id=self.node.id)
+        self._load(rows or [])
+
+    @classmethod
+    def fetch_many(cls, api, nodes: Iterable) -> None:
+        """
+        Fetch settings for many nodes with a single query and load each
+        node's slice into its `settings`
+        """
+        nodes = {node.id: node for node in nodes}
+        params = {f"n{i}": node_id for i, node_id in enumerate(nodes)}
+        if not params:
+            return
+        placeholders = ", ".join(f"@{param}" for param in params)
+        query = f"{NODE_SETTINGS_QUERY} WHERE NodeID IN ({placeholders})"
+        rows_by_node = defaultdict(list)
+        for row in api.query(query, **params) or []:
+            rows_by_node[row["NodeID"]].append(row)
+        for node_id, node in nodes.items():
+            node.settings._load(rows_by_node.get(node_id, []))
+
+    def _load(self, rows: List[Dict]) -> None:
         self._settings = []
-        query = (
-            "SELECT SettingName, SettingValue, NodeSettingID "
-            f"FROM Orion.NodeSettings WHERE NodeID = '{self.node.id}'"
-        )
-        settings = self.api.query(query)
-        if settings:
-            for setting in settings:
-                name = setting["SettingName"]
-                value = setting["SettingValue"]
-                node_setting_id = setting["NodeSettingID"]
-                self._settings.append(self.create(name, value, node_setting_id))
+        self._by_name = {}
+        self._by_id = {}
+        for row in rows:
+            self._append(
+                self.create(
+                    row["SettingName"], row["SettingValue"], row["NodeSettingID"]
+                )
+            )
+
+    def _append(self, setting: OrionNodeSetting) -> None:
+        if self._settings is None:
+            self._settings = []
+        self._settings.append(setting)
+        self._by_name[setting.name] = setting
+        if setting.node_setting_id is not None:
+            self._by_id[setting.node_setting_id] = setting
+
+    def _remove(self, setting: OrionNodeSetting) -> None:
+        self._settings.remove(setting)
+        # update() adds the replacement before removing the old setting, so
+        # only drop index entries that still point at this one
+        if self._by_name.get(setting.name) is setting:
+            del self._by_name[setting.name]
+        if self._by_id.get(setting.node_setting_id) is setting:
+            del self._by_id[setting.node_setting_id]
 
     def create(self, name: str, value, node_setting_id=None) -> OrionNodeSetting:
-        setting_props = self.SETTING_MAP.get(name)
-        if setting_props:
-            setting_class = setting_props["class"]
-        else:
-            setting_class = OrionNodeSetting
+        spec = self.SETTING_MAP.get(name)
+        setting_class = spec.setting_class if spec else OrionNodeSetting
         return setting_class(self.node, name, value, node_setting_id)
 
     def get(
@@ -99,42 +199,44 @@ class OrionNodeSettings(object):
     ) -> Union[OrionNodeSetting, None]:
         if name is None and node_setting_id is None:
             raise ValueError("must provide either setting `name` or `node_setting_id`")
-        if self._settings:
-            for setting in self._settings:
-                if node_setting_id is not None:
-                    if node_setting_id == setting.node_setting_id:
-                        return setting
-                if name == setting.name:
-                    return setting
+        self.ensure_fetched()
+        setting = None
+        if node_setting_id is not None:
+            setting = self._by_id.get(node_setting_id)
+        if setting is None and name is not None:
+            setting = self._by_name.get(name)
+        return setting
 
     def add(self, setting: OrionNodeSetting) -> bool:
-        statement = (
-            "INSERT INTO NodeSettings (NodeID, SettingName, SettingValue) VALUES "
-            f"('{setting.node.id}', '{setting.name}', '{setting.value}')"
+        self.ensure_fetched()
+        uri = self.api.create(
+            "Orion.NodeSettings",
+            NodeID=setting.node.id,
+            SettingName=setting.name,
+            SettingValue=setting.value,
         )
-        self.api.sql(statement)
-        # raw SQL statements don't return anything, so we need to pull the
-        # node_setting_id from a separate query
-        query = (
-            "SELECT SettingName, SettingValue, NodeSettingID "
-            f"FROM Orion.NodeSettings WHERE NodeID = '{self.node.id}' "
-            f"AND SettingName = '{setting.name}'"
-        )
-        result = self.api.query(query)
-        if result:
-            setting.node_setting_id = result[0]["NodeSettingID"]
+        match = NODE_SETTING_ID_RE.search(str(uri))
+        if match:
+            setting.node_setting_id = int(match.group(1))
         else:
-            raise SWObjectCreationError(
-                f'found no setting "{setting.name}" '
-                f"for NodeID {self.node.id} after attempting creation"
+            # the row was created, so look its id up rather than report a
+            # failure the caller might retry into a duplicate
+            row = self.api.query_one(
+                NODE_SETTING_ID_QUERY, node_id=setting.node.id, name=setting.name
             )
-        self._settings.append(setting)
+            if not row:
+                raise SWObjectCreationError(
+                    f'found no setting "{setting.name}" '
+                    f"for NodeID {self.node.id} after attempting creation"
+                )
+            setting.node_setting_id = row["NodeSettingID"]
+        self._append(setting)
         return True
 
     def delete(self, setting: OrionNodeSetting) -> bool:
-        statement = f"DELETE FROM NodeSettings WHERE NodeSettingID = '{setting.node_setting_id}'"
-        self.api.sql(statement)
-        self._settings.remove(setting)
+        self.ensure_fetched()
+        self.api.sql(_delete_statement(setting))
+        self._remove(setting)
         return True
 
     def update(
@@ -146,40 +248,48 @@ class OrionNodeSettings(object):
         return False
 
     def save(self) -> bool:
-        for setting_name, setting_props in self.SETTING_MAP.items():
-            node_attr = setting_props["node_attr"]
-            setting_value_attr = setting_props["setting_value_attr"]
-            node_attr_value = getattr(self.node, node_attr)
-            old_setting = self.get(name=setting_name)
+        """
+        Write every changed setting in one ExecuteSQL batch, then re-fetch
+        to pick up the new NodeSettingIDs
+        """
+        self.ensure_fetched()
+        node = self.node
+        statements = []
+        for setting_name, spec in self.SETTING_SPECS:
+            node_attr_value = getattr(node, spec.node_attr)
+            old_setting = self._by_name.get(setting_name)
             if node_attr_value is None:
                 if old_setting:
-                    old_setting.delete()
-            else:
-                setting_value = getattr(node_attr_value, setting_value_attr)
-                if isinstance(node_attr_value, Endpoint):
-                    if node_attr_value.exists() is False:
-                        raise SWObjectNotFound(
-                            f'{node_attr_value.endpoint} "{node_attr_value.name}" does not exist'
-                        )
+                    statements.append(_delete_statement(old_setting))
+                continue
 
-                if old_setting:
-                    if old_setting.name == setting_name and str(
-                        old_setting.value
-                    ) == str(setting_value):
-                        logger.debug(
-                            f'setting "{setting_name}" with value "{setting_value}" already set'
-                        )
-                    else:
-                        new_setting = self.create(
-                            name=setting_name, value=setting_value
-                        )
-                        self.update(old_setting, new_setting)
-                else:
-                    new_setting = self.create(name=setting_name, value=setting_value)
-                    self.add(new_setting)
+            setting_value = getattr(node_attr_value, spec.setting_value_attr)
+            if isinstance(node_attr_value, Endpoint):
+                if node_attr_value.exists() is False:
+                    raise SWObjectNotFound(
+                        f'{node_attr_value.endpoint} "{node_attr_value.name}" does not exist'
+                    )
+            if old_setting:
+                # SWIS returns setting values as strings, so fall back to
+                # comparing them as strings when they aren't equal as-is
+                old_value = old_setting.value
+                if old_value == setting_value or str(old_value) == str(setting_value):
+                    logger.debug(
+                        f'setting "{setting_name}" with value "{setting_value}" already set'
+                    )
+                    continue
+                statements.append(_delete_statement(old_setting))
+            statements.append(_insert_statement(node.id, setting_name, setting_value))
+        if not statements:
+            return False
+        self.api.sql(";\n".join(statements))
+        self.fetch()
+        return True
 
     def __getitem__(self, item):
-        return self._settings[item]
+        self.ensure_fetched()
+        return (self._settings or [])[item]
 
     def __repr__(self):
-        return str(self._settings)
+        self.ensure_fetched()
+        return str(self._settings or [])
@@ -3,6 +3,7 @@ from solarwinds.model import BaseModel
 
 
 class WorldMap(BaseModel):
+    __slots__ = ()
     name = "WorldMap"
 
     def point(self, **kwargs):
@@ -1,38 +1,64 @@
-import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 
-def parse_response(response: List) -> Optional[Dict]:
-    """Parse a response from SWIS"""
-    if response is not None:
-        result = response.get("results")
-        if len(result) == 0:
-            return None
-        else:
-            return result
-    else:
+def parse_response(response: Optional[Dict]) -> Optional[List]:
+    """Parse a response from SWIS: its result rows, or None if there are none"""
+    if not response:
         return None
+    return response.get("results") or None
 
 
 def sanitize_swdata(swdata: Dict) -> Dict:
-    for k, v in swdata.items():
-        if isinstance(v, str):
-            if re.match(r"^\d+$", v):
-                swdata[k] = int(v)
-    return swdata
+    """Return a copy of swdata with integer strings converted to int"""
+    # only unsigned strings of decimal digits are converted; unlike isdigit(),
+    # isdecimal() rejects characters such as superscripts that int() can't parse
+    return {
+        k: int(v) if isinstance(v, str) and v.isdecimal() else v
+        for k, v in swdata.items()
+    }
 
 
+@lru_cache(maxsize=1024)
 def camel_to_snake(name: str) -> str:
-    """https://stackoverflow.com/questions/1175208/elegant-python-function-to-convert-camelcase-to-snake-case"""
-    name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
-    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", name).lower()
+    """
+    NodeID -> node_id, IPAddress -> ip_address. An underscore goes before an
+    uppercase letter that follows a lowercase letter or digit, or that starts
+    a new word. SWIS uses a small set of property names, so results are cached.
+    """
+    if name.islower():
+        # already snake_case (or a single lowercase word)
+        return name
+    out = []
+    last = len(name) - 1
+    for i, c in enumerate(name):
+        if i and c.isupper():
+            prev = name[i - 1]
+            if prev.islower() or prev.isdigit() or (i < last and name[i + 1].islower()):
+                out.append("_")
+        out.append(c.lower())
+    return "".join(out)
+
+
+# strips braces and quotes from a dict's repr in one pass
+PRINT_DICT_TABLE = str.maketrans("", "", "{}'")
 
 
 def print_dict(dct: Dict) -> str:
-    return str(dct).replace("{", "").replace("}", "").replace("'", "")
+    return str(dct).translate(PRINT_DICT_TABLE)
 
 
+@lru_cache(maxsize=4096)
 def parse_datetime(date: Optional[str]) -> Optional[datetime]:
-    if date:
+    """
+    Parse a SWIS timestamp such as 2024-01-02T03:04:05.123. Results are
+    cached, since the same timestamps repeat across the rows of a response.
+    """
+    if not date:
+        return None
+    try:
+        return datetime.fromisoformat(date)
+    except ValueError:
+        # fromisoformat before Python 3.11 only takes 3 or 6 fractional digits
         return datetime.strptime(date, "%Y-%m-%dT%H:%M:%S.%f")
@@ -0,0 +1,86 @@
+"""
+SWIS stand-ins for tests that don't need a live server. A handler gets each
+request and its decoded JSON body and returns an httpx.Response.
+"""
+
+import json
+import time
+
+import httpx
+
+import solarwinds
+
+
+class MockSWIS:
+    def __init__(self, handler, hostname="sw.example", username="user", **kwargs):
+        self.handler = handler
+        # (method, url, decoded body) of every request sent
+        self.calls = []
+        self.sw = solarwinds.SolarWinds(hostname, username, "pass", **kwargs)
+        self.api = self.sw.api
+        self.api.client = httpx.Client(transport=httpx.MockTransport(self._handle))
+        self.api._async_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self._handle)
+        )
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        self.calls.append((request.method, str(request.url), body))
+        return self.handler(request, body)
+
+    def queries(self, text=""):
+        """Bodies of the queries sent whose SWQL contains `text`"""
+        return [
+            body
+            for method, url, body in self.calls
+            if url.endswith("/Query") and text in body["query"]
+        ]
+
+    def requests_to(self, text):
+        return [call for call in self.calls if text in call[1]]
+
+
+def results(rows):
+    return httpx.Response(200, json={"results": rows})
+
+
+def credential_row(id, name=None):
+    return {
+        "ID": id,
+        "Name": name or f"cred{id}",
+        "CredentialOwner": "Orion",
+        "Description": "",
+        "Uri": f"swis://sw.example/Orion/Orion.Credential/ID={id}",
+        "CredentialType": "SolarWinds.Orion.Core.Models.Credentials.SnmpCredentialsV3",
+    }
+
+
+class MemoryCache:
+    """The parts of diskcache.Cache that API uses, kept in a dict"""
+
+    def __init__(self):
+        # key -> (value, expire time, tag)
+        self.entries = {}
+
+    def get(self, key, default=None, expire_time=False):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.entries[key]
+            entry = None
+        if entry is None:
+            return (default, None) if expire_time else default
+        return (entry[0], entry[1]) if expire_time else entry[0]
+
+    def set(self, key, value, expire=None, tag=None):
+        expires = time.time() + expire if expire is not None else None
+        self.entries[key] = (value, expires, tag)
+        return True
+
+    def evict(self, tag):
+        evicted = [key for key, entry in self.entries.items() if entry[2] == tag]
+        for key in evicted:
+            del self.entries[key]
+        return len(evicted)
+
+    def tags(self):
+        return {entry[2] for entry in self.entries.values()}
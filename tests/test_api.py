@@ -0,0 +1,306 @@
+import asyncio
+import importlib
+import json
+import time
+
+import httpx
+import pytest
+
+from solarwinds import defaults as d
+from solarwinds.api import _shared_clients
+from solarwinds.exceptions import SWISError
+
+from .mocks import MemoryCache, MockSWIS, results
+
+# solarwinds.api is also the name of the API class re-exported by the package
+api_module = importlib.import_module("solarwinds.api")
+
+
+def echo_rows(request, body):
+    if request.url.path.endswith("/Query"):
+        return results([{"query": body["query"]}])
+    return httpx.Response(200, json="swis://sw.example/Orion/Orion.Nodes/NodeID=1")
+
+
+def test_shared_pool_is_not_keyed_on_the_password():
+    swis = MockSWIS(echo_rows)
+    for key in _shared_clients:
+        assert "pass" not in key
+    assert "pass" not in swis.api._client_key
+
+
+def test_connection_follows_hostname():
+    cache = MemoryCache()
+    swis = MockSWIS(echo_rows, cache=cache)
+    api = swis.api
+    assert api.connection == "user@sw.example"
+    api.query("SELECT 1")
+    api.hostname = "engine.example"
+    assert api.connection == "user@engine.example"
+    assert api.url.startswith("https://engine.example:17778/")
+    api.query("SELECT 1")
+    assert cache.tags() == {"user@sw.example", "user@engine.example"}
+    # a write evicts the entries of the host the API now talks to
+    api.create("Orion.Nodes", Caption="x")
+    assert cache.tags() == {"user@sw.example"}
+
+
+def replies(*responses):
+    """A handler answering with each of `responses` in turn, repeating the last"""
+    pending = list(responses)
+
+    def handler(request, body):
+        return pending.pop(0) if len(pending) > 1 else pending[0]
+
+    return handler
+
+
+def test_query_is_retried_after_503():
+    swis = MockSWIS(replies(httpx.Response(503), results([{"NodeID": 1}])), backoff=0)
+    assert swis.api.query("SELECT NodeID FROM Orion.Nodes") == [{"NodeID": 1}]
+    assert len(swis.calls) == 2
+
+
+def test_retry_after_is_honored_and_capped(monkeypatch):
+    slept = []
+    monkeypatch.setattr(api_module.time, "sleep", slept.append)
+    swis = MockSWIS(
+        replies(
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(429, headers={"Retry-After": "86400"}),
+            results([{"n": 1}]),
+        )
+    )
+    assert swis.api.query("SELECT 1") == [{"n": 1}]
+    assert slept == [2.0, d.API_RETRY_MAX_DELAY]
+
+
+@pytest.mark.parametrize(
+    "status, attempts", [(429, 4), (503, 4), (502, 1), (504, 1), (500, 1)]
+)
+def test_writes_are_retried_only_when_turned_away(status, attempts):
+    swis = MockSWIS(replies(httpx.Response(status)), backoff=0)
+    with pytest.raises(SWISError):
+        swis.api.create("Orion.Nodes", Caption="x")
+    assert len(swis.calls) == attempts
+
+
+def test_retries_give_up_after_max_retries():
+    swis = MockSWIS(replies(httpx.Response(502)), backoff=0, max_retries=2)
+    with pytest.raises(SWISError):
+        swis.api.query("SELECT 1")
+    assert len(swis.calls) == 3
+
+
+def test_async_query_is_retried_after_503():
+    swis = MockSWIS(replies(httpx.Response(503), results([{"n": 1}])), backoff=0)
+    assert asyncio.run(swis.api.aquery("SELECT 1")) == [{"n": 1}]
+    assert len(swis.calls) == 2
+
+
+def test_repeated_query_is_served_from_cache():
+    cache = MemoryCache()
+    swis = MockSWIS(echo_rows, cache=cache)
+    first = swis.api.query("SELECT 1")
+    assert swis.api.query("SELECT 1") == first
+    # a fresh API over the same cache reads the stored response
+    other = MockSWIS(echo_rows, cache=cache)
+    assert other.api.query("SELECT 1") == first
+    assert len(swis.queries()) == 1
+    assert not other.calls
+
+
+def test_read_is_served_from_cache():
+    swis = MockSWIS(echo_rows, cache=MemoryCache())
+    uri = "swis://sw.example/Orion/Orion.Nodes/NodeID=1"
+    assert swis.api.read(uri) == swis.api.read(uri)
+    assert len(swis.calls) == 1
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda api: api.create("Orion.Nodes", Caption="x"),
+        lambda api: api.update("swis://sw.example/Orion/Orion.Nodes/NodeID=1", x=1),
+        lambda api: api.update(["swis://sw.example/Orion/Orion.Nodes/NodeID=1"], x=1),
+        lambda api: api.delete("swis://sw.example/Orion/Orion.Nodes/NodeID=1"),
+        lambda api: api.delete(["swis://sw.example/Orion/Orion.Nodes/NodeID=1"]),
+        lambda api: api.invoke("Orion.Nodes", "Unmanage"),
+        lambda api: asyncio.run(api.acreate("Orion.Nodes", Caption="x")),
+        lambda api: asyncio.run(api.ainvoke("Orion.Nodes", "Unmanage")),
+    ],
+    ids=[
+        "create",
+        "update",
+        "bulk-update",
+        "delete",
+        "bulk-delete",
+        "invoke",
+        "acreate",
+        "ainvoke",
+    ],
+)
+def test_write_evicts_cached_responses(write):
+    cache = MemoryCache()
+    swis = MockSWIS(echo_rows, cache=cache)
+    swis.api.query("SELECT 1")
+    assert cache.entries
+    write(swis.api)
+    assert not cache.entries
+    swis.api.query("SELECT 1")
+    assert len(swis.queries()) == 2
+
+
+def test_failed_write_still_evicts():
+    def handler(request, body):
+        if request.url.path.endswith("/Query"):
+            return results([{"n": 1}])
+        return httpx.Response(500)
+
+    cache = MemoryCache()
+    swis = MockSWIS(handler, cache=cache)
+    swis.api.query("SELECT 1")
+    with pytest.raises(SWISError):
+        swis.api.create("Orion.Nodes", Caption="x")
+    assert not cache.entries
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"username": "other"}, {"hostname": "other.example"}]
+)
+def test_connections_do_not_share_cached_responses(kwargs):
+    cache = MemoryCache()
+    swis = MockSWIS(echo_rows, cache=cache)
+    other = MockSWIS(echo_rows, cache=cache, **kwargs)
+    swis.api.query("SELECT 1")
+    other.api.query("SELECT 1")
+    assert len(swis.queries()) == len(other.queries()) == 1
+    # and a write through one leaves the other's entries alone
+    other.api.create("Orion.Nodes", Caption="x")
+    assert cache.tags() == {swis.api.connection}
+
+
+def test_parsed_rows_expire_with_the_disk_entry():
+    cache = MemoryCache()
+    MockSWIS(echo_rows, cache=cache).api.query("SELECT 1")
+    # the stored response has a moment left when another API first reads it
+    ((key, (body, expires, tag)),) = cache.entries.items()
+    cache.entries[key] = (body, time.time() + 0.05, tag)
+    swis = MockSWIS(echo_rows, cache=cache)
+    swis.api.query("SELECT 1")
+    swis.api.query("SELECT 1")
+    assert not swis.calls
+    time.sleep(0.1)
+    swis.api.query("SELECT 1")
+    assert len(swis.queries()) == 1
+
+
+def test_parsed_rows_are_bounded(monkeypatch):
+    monkeypatch.setattr(d, "API_PARSED_CACHE_SIZE", 2)
+    cache = MemoryCache()
+    swis = MockSWIS(echo_rows, cache=cache)
+    for n in (1, 2, 3):
+        swis.api.query(f"SELECT {n}")
+    assert len(swis.api._parsed) == 2
+    # with the disk entries gone, only the oldest query goes back to SWIS
+    cache.entries.clear()
+    swis.api.query("SELECT 3")
+    swis.api.query("SELECT 2")
+    swis.api.query("SELECT 1")
+    assert [body["query"] for body in swis.queries()][3:] == ["SELECT 1"]
+
+
+def test_parsed_rows_are_not_shared_with_callers():
+    swis = MockSWIS(echo_rows, cache=MemoryCache())
+    rows = swis.api.query("SELECT 1")
+    rows[0]["query"] = "changed"
+    rows.append({})
+    assert swis.api.query("SELECT 1") == [{"query": "SELECT 1"}]
+    assert swis.api.query("SELECT 1")[0] is not swis.api.query("SELECT 1")[0]
+
+
+def test_parsed_rows_are_dropped_after_a_write():
+    swis = MockSWIS(echo_rows, cache=MemoryCache())
+    swis.api.query("SELECT 1")
+    swis.api.create("Orion.Nodes", Caption="x")
+    assert not swis.api._parsed
+    swis.api.query("SELECT 1")
+    assert len(swis.queries()) == 2
+
+
+def read_row(request, body):
+    return httpx.Response(200, json={"Uri": str(request.url).rpartition("/Json/")[2]})
+
+
+URIS = [f"swis://sw.example/Orion/Orion.Nodes/NodeID={id}" for id in range(20)]
+
+
+def test_read_many_keeps_order():
+    swis = MockSWIS(read_row)
+    assert [row["Uri"] for row in swis.api.read_many(URIS, max_workers=4)] == URIS
+
+
+def test_aread_many_keeps_order():
+    swis = MockSWIS(read_row)
+    rows = asyncio.run(swis.api.aread_many(URIS))
+    assert [row["Uri"] for row in rows] == URIS
+
+
+def test_aread_many_is_bounded_by_the_pool(monkeypatch):
+    monkeypatch.setattr(d, "API_MAX_CONNECTIONS", 3)
+    in_flight = []
+    most = 0
+
+    async def aread(self, uri):
+        nonlocal most
+        in_flight.append(uri)
+        most = max(most, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(uri)
+        return {"Uri": uri}
+
+    monkeypatch.setattr(api_module.API, "aread", aread)
+    swis = MockSWIS(read_row)
+    assert len(asyncio.run(swis.api.aread_many(URIS))) == len(URIS)
+    assert most == 3
+
+
+def streamed_rows(request, body):
+    rows = [{"NodeID": id, "Caption": f"n{id}"} for id in range(3)]
+    return httpx.Response(
+        200, stream=httpx.ByteStream(json.dumps({"results": rows}).encode())
+    )
+
+
+@pytest.mark.parametrize("incremental", [None, False])
+def test_stream_query_yields_rows(incremental):
+    swis = MockSWIS(streamed_rows)
+    rows = swis.api.stream_query(
+        "SELECT NodeID, Caption FROM Orion.Nodes", incremental=incremental
+    )
+    assert [row["NodeID"] for row in rows] == [0, 1, 2]
+    assert swis.queries()[0]["parameters"] == {}
+
+
+def test_stream_query_parses_incrementally():
+    pytest.importorskip("ijson")
+    swis = MockSWIS(streamed_rows)
+    rows = swis.api.stream_query("SELECT NodeID FROM Orion.Nodes", incremental=True)
+    assert [row["Caption"] for row in rows] == ["n0", "n1", "n2"]
+
+
+def test_stream_query_raises_swis_errors():
+    swis = MockSWIS(
+        lambda request, body: httpx.Response(400, json={"Message": "bad SWQL"})
+    )
+    with pytest.raises(SWISError, match="bad SWQL"):
+        list(swis.api.stream_query("SELECT nonsense", id=1))
+    assert swis.queries()[0]["parameters"] == {"id": 1}
+
+
+def test_stream_query_names_the_extra_it_needs(monkeypatch):
+    monkeypatch.setattr(api_module, "ijson", None)
+    swis = MockSWIS(streamed_rows)
+    with pytest.raises(ImportError, match=r"solarwinds\[stream\]"):
+        swis.api.stream_query("SELECT 1", incremental=True)
+    assert not swis.calls
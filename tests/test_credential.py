@@ -0,0 +1,181 @@
+import asyncio
+
+import httpx
+import pytest
+
+from solarwinds import defaults as d
+from solarwinds.endpoints.orion.credential import (
+    clear_credential_cache,
+    query_credential,
+)
+from solarwinds.exceptions import SWISError
+from solarwinds.models.orion.credential import credential_model
+from solarwinds.models.orion.node_settings import SNMPCredentialSetting
+
+from .mocks import MockSWIS, credential_row, results
+from .test_node_settings import Node
+
+
+def credential_swis(**kwargs):
+    """SWIS with credentials of any ID, named cred<ID>, until they're deleted"""
+    deleted = set()
+
+    def handler(request, body):
+        if request.method == "DELETE":
+            deleted.add(int(request.url.path.rpartition("=")[2]))
+            return httpx.Response(200, content=b"null")
+        if request.method == "GET":
+            # reading a credential's uri
+            id = int(request.url.path.rpartition("=")[2])
+            return httpx.Response(200, json=credential_row(id))
+        if not request.url.path.endswith("/Query"):
+            return httpx.Response(200, content=b"null")
+        if "FROM Orion.Credential" in body["query"]:
+            value = body["parameters"]["value"]
+            id = value if isinstance(value, int) else int(value[4:])
+            return results([] if id in deleted else [credential_row(id)])
+        return results([])
+
+    return MockSWIS(handler, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def empty_credential_cache():
+    clear_credential_cache()
+    yield
+    clear_credential_cache()
+
+
+def test_entity_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(d, "CREDENTIAL_CACHE_SIZE", 4)
+    model = credential_model(credential_swis().api)
+    for id in range(1, 6):
+        model.get(id=id)
+    # each credential is kept by id and by name
+    assert list(model._cache) == [("id", 4), ("name", "cred4")] + [
+        ("id", 5),
+        ("name", "cred5"),
+    ]
+
+
+def test_nodes_share_one_model_per_api():
+    swis = credential_swis()
+    assert credential_model(swis.api) is swis.sw.orion.credential
+    creds = []
+    for node_id in (1, 2, 3):
+        setting = SNMPCredentialSetting(
+            Node(swis.api, node_id), "ROSNMPCredentialID", 7
+        )
+        setting.build()
+        creds.append(setting.node_attr_value)
+    assert creds[0] is creds[1] is creds[2]
+    assert len(swis.queries("FROM Orion.Credential")) == 1
+
+
+def test_apis_get_their_own_model():
+    one, two = credential_swis(), credential_swis()
+    assert credential_model(one.api) is not credential_model(two.api)
+    assert credential_model(two.api).api is two.api
+
+
+def test_lookup_is_cached_until_it_expires(monkeypatch):
+    swis = credential_swis()
+    assert query_credential(swis.api, "id", 7) == credential_row(7)
+    assert query_credential(swis.api, "id", 7) == credential_row(7)
+    assert len(swis.queries("FROM Orion.Credential")) == 1
+    monkeypatch.setattr(d, "CREDENTIAL_CACHE_TTL", -1)
+    query_credential(swis.api, "id", 8)
+    query_credential(swis.api, "id", 8)
+    assert len(swis.queries("FROM Orion.Credential")) == 3
+
+
+def test_lookup_misses_after_clear():
+    swis = credential_swis()
+    query_credential(swis.api, "name", "cred7")
+    clear_credential_cache()
+    query_credential(swis.api, "name", "cred7")
+    assert len(swis.queries("FROM Orion.Credential")) == 2
+
+
+def test_delete_drops_the_cached_row():
+    swis = credential_swis()
+    credential = credential_model(swis.api).get(id=7)
+    assert query_credential(swis.api, "id", 7)
+    assert credential.delete()
+    assert query_credential(swis.api, "id", 7) is None
+    assert credential_model(swis.api).get(id=7) is None
+
+
+def test_apis_do_not_share_lookups():
+    one = credential_swis()
+    two = credential_swis(username="other")
+    query_credential(one.api, "id", 7)
+    query_credential(two.api, "id", 7)
+    query_credential(one.api, "id", 7)
+    assert len(one.queries("FROM Orion.Credential")) == 1
+    assert len(two.queries("FROM Orion.Credential")) == 1
+
+
+def test_aget_looks_up_credentials_concurrently():
+    swis = credential_swis()
+    model = credential_model(swis.api)
+
+    async def get_all():
+        return await asyncio.gather(
+            model.aget(id=7), model.aget(name="cred8"), model.aget(id=9)
+        )
+
+    by_id, by_name, other = asyncio.run(get_all())
+    assert (by_id.id, by_name.id, other.id) == (7, 8, 9)
+    assert by_name.name == "cred8"
+    # and the results are cached like get()'s
+    assert model.get(id=7) is by_id
+    assert len(swis.queries("FROM Orion.Credential")) == 3
+
+
+def test_aget_returns_none_for_missing_credential():
+    swis = credential_swis()
+    credential_model(swis.api).get(id=7).delete()
+    assert asyncio.run(credential_model(swis.api).aget(id=7)) is None
+
+
+def creating_swis():
+    """SWIS that creates credentials as IDs 100 onwards, except ones named "bad" """
+    created = []
+
+    def handler(request, body):
+        if "/Invoke/Orion.Credential/" in request.url.path:
+            if body[0] == "bad":
+                return httpx.Response(500, json={"Message": "duplicate name"})
+            created.append(body[0])
+            return httpx.Response(200, json=99 + len(created))
+        return results([])
+
+    return MockSWIS(handler)
+
+
+def test_create_many_reports_failures_per_credential():
+    swis = creating_swis()
+    created = swis.sw.orion.credential.create_many(
+        "snmpv2",
+        [
+            {"name": "one", "community": "public"},
+            {"name": "bad", "community": "public"},
+            {"name": "two", "community": "private"},
+            {"name": "three"},
+        ],
+    )
+    one, bad, two, missing_community = created
+    assert sorted([one.id, two.id]) == [100, 101]
+    assert (one.name, two.name) == ("one", "two")
+    assert isinstance(bad, SWISError) and "duplicate name" in str(bad)
+    assert isinstance(missing_community, ValueError)
+    assert len(swis.requests_to("/Invoke/Orion.Credential/CreateSNMPCredentials")) == 3
+
+
+@pytest.mark.parametrize("kind", ["snmpv1", "cache_clear", "invalidate"])
+def test_create_many_rejects_unknown_kinds(kind):
+    swis = creating_swis()
+    with pytest.raises(ValueError, match="kind must be"):
+        swis.sw.orion.credential.create_many(kind, [{"name": "one"}])
+    assert not swis.calls
@@ -0,0 +1,23 @@
+import pytest
+
+from solarwinds.endpoints.orion.node import OrionNode
+from solarwinds.exceptions import SWNonUniqueResult
+
+from .mocks import MockSWIS, results
+
+URI_1 = "swis://sw.example/Orion/Orion.Nodes/NodeID=1"
+URI_2 = "swis://sw.example/Orion/Orion.Nodes/NodeID=2"
+
+
+def test_duplicate_node_ip_is_ambiguous():
+    # Orion allows several nodes with one IP, so an IP lookup must not
+    # settle on whichever row comes first
+    def handler(request, body):
+        return results([{"uri": URI_1, "id": 1}, {"uri": URI_2, "id": 2}])
+
+    swis = MockSWIS(handler)
+    with pytest.raises(SWNonUniqueResult):
+        OrionNode(swis.api, ip_address="10.0.0.1")
+    (query,) = swis.queries("FROM Orion.Nodes")
+    assert "SELECT TOP 2 " in query["query"]
+    assert query["parameters"] == {"value": "10.0.0.1"}
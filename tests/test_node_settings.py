@@ -0,0 +1,156 @@
+import httpx
+import pytest
+
+from solarwinds.endpoints.orion.credential import clear_credential_cache
+from solarwinds.exceptions import SWObjectCreationError
+from solarwinds.models.orion.node_settings import (
+    OrionNodeSetting,
+    OrionNodeSettings,
+    _sql_literal,
+)
+
+from .mocks import MockSWIS, credential_row, results
+
+NESTED_URI = "swis://sw.example/Orion/Orion.Nodes/NodeID=1/NodeSettings/NodeSettingID=5"
+TOP_LEVEL_URI = "swis://sw.example/Orion/Orion.NodeSettings/NodeSettingID=5"
+
+
+class Node:
+    """Just enough of an OrionNode for its settings"""
+
+    snmpv3_ro_cred = None
+    snmpv3_rw_cred = None
+
+    def __init__(self, api, id=1):
+        self.api = api
+        self.id = id
+        self.uri = f"swis://sw.example/Orion/Orion.Nodes/NodeID={id}"
+        self.settings = OrionNodeSettings(self)
+
+
+def settings_swis(create_response, id_rows=()):
+    def handler(request, body):
+        if request.url.path.endswith("/Create/Orion.NodeSettings"):
+            return httpx.Response(200, json=create_response)
+        if "SELECT TOP 1 NodeSettingID" in body["query"]:
+            return results(list(id_rows))
+        return results([])
+
+    return MockSWIS(handler)
+
+
+@pytest.mark.parametrize("uri", [NESTED_URI, TOP_LEVEL_URI])
+def test_add_reads_id_from_uri(uri):
+    swis = settings_swis(uri)
+    node = Node(swis.api)
+    setting = OrionNodeSetting(node, "Foo", "bar")
+    assert node.settings.add(setting)
+    assert setting.node_setting_id == 5
+    assert node.settings.get(name="Foo") is setting
+    assert not swis.queries("SELECT TOP 1 NodeSettingID")
+
+
+def test_add_queries_id_when_uri_is_unexpected():
+    swis = settings_swis("unexpected", id_rows=[{"NodeSettingID": 7}])
+    node = Node(swis.api)
+    setting = OrionNodeSetting(node, "Foo", "bar")
+    assert node.settings.add(setting)
+    assert setting.node_setting_id == 7
+    (query,) = swis.queries("SELECT TOP 1 NodeSettingID")
+    assert query["parameters"] == {"node_id": 1, "name": "Foo"}
+
+
+def test_add_raises_when_created_row_is_missing():
+    swis = settings_swis("unexpected")
+    node = Node(swis.api)
+    with pytest.raises(SWObjectCreationError):
+        node.settings.add(OrionNodeSetting(node, "Foo", "bar"))
+
+
+@pytest.mark.parametrize(
+    "value, literal",
+    [
+        ("public", "'public'"),
+        ("it's", "'it''s'"),
+        ("'; DROP TABLE Nodes; --", "'''; DROP TABLE Nodes; --'"),
+        (None, "NULL"),
+        (42, "'42'"),
+    ],
+)
+def test_sql_literal(value, literal):
+    assert _sql_literal(value) == literal
+
+
+def setting_row(name, value, id):
+    return {
+        "NodeID": 1,
+        "SettingName": name,
+        "SettingValue": value,
+        "NodeSettingID": id,
+    }
+
+
+def saving_swis(rows, rows_after_save):
+    """SWIS whose node settings are `rows` until an ExecuteSQL runs"""
+    saved = []
+
+    def handler(request, body):
+        if request.url.path.endswith("/ExecuteSQL"):
+            saved.append(body)
+            return httpx.Response(200, content=b"null")
+        if request.method == "GET":
+            id = int(request.url.path.rpartition("=")[2])
+            return httpx.Response(200, json=credential_row(id))
+        query = body["query"]
+        if "FROM Orion.NodeSettings" in query:
+            return results(rows_after_save if saved else rows)
+        if "FROM Orion.Credential" in query:
+            return results([credential_row(body["parameters"]["value"])])
+        return results([])
+
+    clear_credential_cache()
+    return MockSWIS(handler)
+
+
+class Credential:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_save_writes_changes_in_one_batch_and_refetches():
+    swis = saving_swis(
+        rows=[
+            setting_row("ROSNMPCredentialID", "7", 11),
+            setting_row("RWSNMPCredentialID", "7", 12),
+        ],
+        rows_after_save=[setting_row("ROSNMPCredentialID", "8", 13)],
+    )
+    node = Node(swis.api)
+    node.settings.ensure_fetched()
+    assert node.snmpv3_ro_cred.id == node.snmpv3_rw_cred.id == 7
+    node.snmpv3_ro_cred = Credential(8)
+    node.snmpv3_rw_cred = None
+    assert node.settings.save()
+
+    (batch,) = [body for method, url, body in swis.requests_to("/ExecuteSQL")]
+    assert batch == [
+        "DELETE FROM NodeSettings WHERE NodeSettingID = 11;\n"
+        "INSERT INTO NodeSettings (NodeID, SettingName, SettingValue) "
+        "VALUES (1, 'ROSNMPCredentialID', '8');\n"
+        "DELETE FROM NodeSettings WHERE NodeSettingID = 12"
+    ]
+    assert not swis.requests_to("/Create/")
+    # the new rows' ids come from fetching the settings again
+    assert len(swis.queries("FROM Orion.NodeSettings")) == 2
+    assert node.settings.get(name="ROSNMPCredentialID").node_setting_id == 13
+    assert node.settings.get(name="RWSNMPCredentialID") is None
+
+
+def test_save_skips_unchanged_settings():
+    swis = saving_swis(
+        rows=[setting_row("ROSNMPCredentialID", "7", 11)], rows_after_save=[]
+    )
+    node = Node(swis.api)
+    node.settings.ensure_fetched()
+    assert not node.settings.save()
+    assert not swis.requests_to("/ExecuteSQL")
@@ -0,0 +1,242 @@
+import re
+
+import httpx
+import pytest
+
+from solarwinds.endpoints.orion.credential import clear_credential_cache
+from solarwinds.exceptions import SWISError
+
+from .mocks import MockSWIS, credential_row, results
+
+NODE_URI = "swis://sw.example/Orion/Orion.Nodes/NodeID=5"
+ENGINE_URI = "swis://sw.example/Orion/Orion.Engines/EngineID=1"
+
+
+def node_row(id=5, caption="n1", ip_address="10.0.0.5", engine_id=1):
+    return {
+        "NodeID": id,
+        "Caption": caption,
+        "IPAddress": ip_address,
+        "Community": "public",
+        "RWCommunity": "",
+        "EngineID": engine_id,
+        "SNMPVersion": 2,
+        "Status": 1,
+        "UnManaged": False,
+        "ObjectSubType": "SNMP",
+        "Uri": f"swis://sw.example/Orion/Orion.Nodes/NodeID={id}",
+    }
+
+
+def orion_swis(failing_ip=None):
+    """
+    SWIS where nodes don't exist until created, and creating `failing_ip`
+    fails. Every created node reads back as node 5.
+    """
+
+    def handler(request, body):
+        path = request.url.path
+        if path.endswith("/Query"):
+            query = body["query"]
+            if "FROM Orion.Engines" in query:
+                return results([{"uri": ENGINE_URI, "id": 1}])
+            return results([])
+        if request.method == "GET":
+            if "Orion.Engines" in path:
+                return httpx.Response(
+                    200, json={"EngineID": 1, "ServerName": "engine", "IP": "10.0.0.1"}
+                )
+            if "CustomProperties" in path:
+                return httpx.Response(200, json={"NodeID": 5})
+            return httpx.Response(200, json=node_row())
+        if path.endswith("/Create/Orion.Nodes"):
+            if body["IPAddress"] == failing_ip:
+                return httpx.Response(500, json={"Message": "nope"})
+            return httpx.Response(200, json=NODE_URI)
+        if "/Create/" in path:
+            return httpx.Response(
+                200, json="swis://sw.example/Orion/Orion.Pollers/PollerID=1"
+            )
+        return httpx.Response(200, json=None)
+
+    return MockSWIS(handler)
+
+
+def test_create_nodes_reports_failures_per_node():
+    swis = orion_swis(failing_ip="10.0.0.9")
+    api = swis.api
+    hostname, url = api.hostname, api.url
+    created, failed, also_created = swis.sw.orion.create_nodes(
+        [
+            {"ip_address": "10.0.0.5", "caption": "n1"},
+            {"ip_address": "10.0.0.9", "caption": "bad"},
+            {"ip_address": "10.0.0.6", "caption": "n2"},
+        ]
+    )
+    assert created.id == also_created.id == 5
+    assert isinstance(failed, SWISError)
+    assert "nope" in str(failed)
+    assert len(swis.requests_to("/Create/Orion.Nodes")) == 3
+    # nothing switched the shared API over to the polling engine
+    assert (api.hostname, api.url) == (hostname, url)
+
+
+def snmpv3_swis(settings=()):
+    """
+    SWIS with no nodes until one is created, as node 5. Its settings are
+    `settings` as (name, value) pairs until an ExecuteSQL replaces them.
+    """
+    state = {"exists": False, "settings": list(settings)}
+
+    def handler(request, body):
+        path = request.url.path
+        if path.endswith("/Query"):
+            query = body["query"]
+            if "FROM Orion.Engines" in query:
+                return results([{"uri": ENGINE_URI, "id": 1}])
+            if "FROM Orion.Nodes" in query and state["exists"]:
+                return results([{"uri": NODE_URI, "id": 5}])
+            if "FROM Orion.NodeSettings" in query:
+                return results(
+                    [
+                        {
+                            "NodeID": 5,
+                            "SettingName": name,
+                            "SettingValue": value,
+                            "NodeSettingID": 10 + i,
+                        }
+                        for i, (name, value) in enumerate(state["settings"])
+                    ]
+                )
+            if "FROM Orion.Credential" in query:
+                return results([credential_row(int(body["parameters"]["value"]))])
+            return results([])
+        if request.method == "GET":
+            if "Orion.Engines" in path:
+                return httpx.Response(
+                    200, json={"EngineID": 1, "ServerName": "engine", "IP": "10.0.0.1"}
+                )
+            if "Orion.Credential" in path:
+                id = int(path.rpartition("=")[2])
+                return httpx.Response(200, json=credential_row(id))
+            if "CustomProperties" in path:
+                return httpx.Response(200, json={"NodeID": 5})
+            row = node_row()
+            row["SNMPVersion"] = 3
+            return httpx.Response(200, json=row)
+        if path.endswith("/ExecuteSQL"):
+            state["settings"] = [
+                (name, value)
+                for name, value in re.findall(r"'(\w+)', '(\d+)'", body[0])
+            ]
+            return httpx.Response(200, content=b"null")
+        if path.endswith("/Create/Orion.Nodes"):
+            state["exists"] = True
+            return httpx.Response(200, json=NODE_URI)
+        if "/Create/" in path:
+            return httpx.Response(
+                200, json="swis://sw.example/Orion/Orion.Pollers/PollerID=1"
+            )
+        return httpx.Response(200, content=b"null")
+
+    swis = MockSWIS(handler)
+    swis.state = state
+    return swis
+
+
+@pytest.fixture(autouse=True)
+def empty_credential_cache():
+    clear_credential_cache()
+
+
+def test_snmpv3_creds_are_fetched_on_first_access():
+    swis = snmpv3_swis(settings=[("ROSNMPCredentialID", "7")])
+    swis.state["exists"] = True
+    node = swis.sw.orion.node(ip_address="10.0.0.5")
+    assert node.exists()
+    assert not swis.queries("FROM Orion.NodeSettings")
+    assert node.snmpv3_ro_cred.id == 7
+    assert node.snmpv3_rw_cred is None
+    assert len(swis.queries("FROM Orion.NodeSettings")) == 1
+
+
+def test_save_replaces_snmpv3_cred_of_existing_node():
+    swis = snmpv3_swis(settings=[("ROSNMPCredentialID", "7")])
+    swis.state["exists"] = True
+    node = swis.sw.orion.node(ip_address="10.0.0.5")
+    node.snmpv3_ro_cred = swis.sw.orion.credential.get(id=8)
+    assert node.save()
+    (batch,) = [body[0] for method, url, body in swis.requests_to("/ExecuteSQL")]
+    assert batch.startswith("DELETE FROM NodeSettings WHERE NodeSettingID = 10;")
+    assert "VALUES (5, 'ROSNMPCredentialID', '8')" in batch
+    # fetched once by the setter, and once more for the new setting's id
+    assert len(swis.queries("FROM Orion.NodeSettings")) == 2
+    assert node.snmpv3_ro_cred.id == 8
+
+
+def test_new_snmpv3_node_does_not_fetch_settings_before_writing_them():
+    swis = snmpv3_swis()
+    cred = swis.sw.orion.credential.get(id=7)
+    node = swis.sw.orion.node(ip_address="10.0.0.5", snmpv3_ro_cred=cred)
+    assert node.create()
+    assert swis.state["settings"] == [("ROSNMPCredentialID", "7")]
+    # only the re-fetch after the settings are written
+    assert len(swis.queries("FROM Orion.NodeSettings")) == 1
+    sql = [i for i, call in enumerate(swis.calls) if call[1].endswith("ExecuteSQL")]
+    settings = [
+        i for i, call in enumerate(swis.calls) if "Orion.NodeSettings" in str(call[2])
+    ]
+    assert settings[0] > sql[0]
+
+
+def listing_swis():
+    """SWIS with nodes 1-6, polled by engines 1 and 2 in turn"""
+    nodes = {
+        id: node_row(id, f"n{id}", f"10.0.0.{id}", 2 - id % 2) for id in range(1, 7)
+    }
+
+    def handler(request, body):
+        path = request.url.path
+        if path.endswith("/Query"):
+            query = body["query"]
+            if "FROM Orion.Nodes ORDER BY NodeID" in query:
+                return results(list(nodes.values()))
+            if "FROM Orion.Engines" in query:
+                id = body["parameters"]["value"]
+                return results(
+                    [
+                        {
+                            "uri": f"swis://sw.example/Orion/Orion.Engines/EngineID={id}",
+                            "id": id,
+                        }
+                    ]
+                )
+            return results([])
+        if "Orion.Engines" in path:
+            id = int(path.rpartition("=")[2])
+            return httpx.Response(
+                200,
+                json={
+                    "EngineID": id,
+                    "ServerName": f"engine{id}",
+                    "IP": f"10.0.1.{id}",
+                },
+            )
+        if "CustomProperties" in path:
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json=nodes[int(path.rpartition("=")[2])])
+
+    return MockSWIS(handler)
+
+
+@pytest.mark.parametrize("max_workers", [None, 3])
+def test_nodes_resolve_each_engine_once(max_workers):
+    swis = listing_swis()
+    nodes = list(swis.sw.orion.nodes(max_workers=max_workers))
+    assert [node.id for node in nodes] == [1, 2, 3, 4, 5, 6]
+    assert len(swis.queries("FROM Orion.Engines")) == 2
+    assert len([call for call in swis.calls if "/Orion.Engines/" in call[1]]) == 2
+    engines = {node.polling_engine.id: node.polling_engine for node in nodes}
+    assert sorted(engines) == [1, 2]
+    for node in nodes:
+        assert node.polling_engine is engines[2 - node.id % 2]